@@ -0,0 +1,553 @@
+"""
+Benchmarks for the course scraper.
+
+Usage:
+    python scripts/bench_scraper.py extract [--courses 300] [--sections 4] [--driver]
+    python scripts/bench_scraper.py sqlite [--rows 100000] [--batch-size 5000]
+    python scripts/bench_scraper.py suite [--rounds 20] [--driver] [--update-baseline]
+    python scripts/bench_scraper.py memory [--units 50 100 200 400] [--courses 30] [--sections 4]
+
+The extract benchmark builds a Global Search style results page and compares
+rows/sec of the bulk BeautifulSoup parser against the WebDriver cell-walking
+path (the latter only with --driver, since it needs a local Chrome).
+
+The sqlite benchmark loads synthetic courses into a scratch database, once
+the way the old end-of-run loader did (one execute per row, default
+journaling, a single commit, its original columns) and once with the batched
+WAL writer. Both databases lack the search and meeting indexes, which the
+legacy loader never maintained.
+
+The suite replays the recorded pages in scripts/fixtures/global_search through
+a local fake_global_search.py server and reports throughput per stage: page
+fetch, section expansion (--driver only), row extraction, normalization,
+generate_course_id and SQLite insert. A fixed pure-Python loop, timed in turns
+with the stages, calibrates the machine's speed, and each stage's fastest turn
+is compared to scripts/fixtures/bench_baseline.json scaled by the ratio of the
+two calibrations, so the baseline holds on faster or slower machines. It exits with
+status 1 when a stage is slower than that allows; a comparison runs at least
+MIN_COMPARE_ROUNDS rounds.
+
+The memory benchmark compares the traced size of a course dict with a
+CourseRecord, then streams growing numbers of synthetic subject pages through
+the crawl pipeline into the JSONL and SQLite sinks under tracemalloc. Peak
+memory has to stay flat as the number of sections grows; it exits with status 1
+when the largest crawl peaks more than --tolerance above the smallest.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from fake_global_search import start_fake_server
+
+from scrape_course import (
+    HTML_PARSER,
+    TERM_CODE,
+    CourseDbWriter,
+    CrawlCollector,
+    CrawlPipeline,
+    GlobalSearchHttpClient,
+    JsonlSink,
+    SectionIndex,
+    build_course,
+    course_to_row,
+    create_driver,
+    create_http_session,
+    discover_colleges,
+    expand_all_sections,
+    extract_courses_from_driver,
+    extract_courses_from_html,
+    extract_rows_from_html,
+    generate_course_id,
+    get_subjects,
+    initialize_database,
+    open_college,
+    return_to_subjects,
+    search_subject,
+    spans,
+)
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "bench_baseline.json")
+# Fewer rounds leave the cheap stages timing a few milliseconds, too noisy to compare
+MIN_COMPARE_ROUNDS = 10
+CALIBRATION_LOOPS = 100000
+
+def build_results_page(num_courses, sections_per_course, first_class=10000):
+    """Build a results page with one expandable table.classinfo per course, class numbers from first_class on"""
+    parts = ["<html><body><form name='searchResultsForm'>"]
+    for course_index in range(num_courses):
+        parts.append(
+            f"<div class='testing_msg'><a id='imageDivLink{course_index}' href='#'>"
+            f"<span>CSCI {100 + course_index} - Course {course_index}</span></a></div>"
+            f"<div id='contentDivImg{course_index}'>"
+            "<table class='classinfo'><thead><tr>"
+            "<th>CLASS</th><th>SECTION</th><th>DAYS &amp; TIMES</th><th>ROOM</th>"
+            "<th>INSTRUCTOR</th><th>INSTRUCTION MODE</th><th>MEETING DATES</th>"
+            "<th>STATUS</th><th>COURSE TOPIC</th></tr></thead><tbody>"
+        )
+        for section_index in range(sections_per_course):
+            class_number = first_class + course_index * sections_per_course + section_index
+            parts.append(
+                "<tr>"
+                f"<td data-label='Class'><a href='#'>{class_number}</a></td>"
+                f"<td data-label='Section'>{section_index + 1:02d}-LEC<br>Regular</td>"
+                "<td data-label='DaysAndTimes'>MoWe 10:00AM-11:15AM</td>"
+                f"<td data-label='Room'>Room {class_number}</td>"
+                f"<td data-label='Instructor'>Instructor {section_index}</td>"
+                "<td data-label='Instruction Mode'>In Person</td>"
+                "<td data-label='Meeting Dates'>08/25/2025 - 12/22/2025</td>"
+                "<td data-label='Status'><img alt='Open' title='Open'>Open</td>"
+                f"<td data-label='Course Topic'>Course {course_index}</td>"
+                "</tr>"
+            )
+        parts.append("</tbody></table></div>")
+    parts.append("</form></body></html>")
+    return "".join(parts)
+
+def _rows_per_second(label, func, repeat):
+    """Run func repeat times and print its best rows/sec"""
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = len(func())
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    rate = rows / best if best else float("inf")
+    print(f"  {label:<28} {rows:>7} rows  {best * 1000:>9.1f} ms  {rate:>12,.0f} rows/sec")
+    return rows, rate
+
+def bench_extract(args):
+    """Compare bulk HTML parsing with per-cell WebDriver extraction"""
+    html = build_results_page(args.courses, args.sections)
+    print(f"📊 Extraction benchmark: {args.courses} courses x {args.sections} sections "
+          f"({len(html) / 1024:.0f} KiB, parser={HTML_PARSER})")
+
+    bulk_rows, bulk_rate = _rows_per_second(
+        "bulk (page_source + bs4)",
+        lambda: extract_courses_from_html(html, "HTR01", "Hunter College", "CSCI"),
+        args.repeat,
+    )
+
+    if not args.driver:
+        print("  (pass --driver to also time the WebDriver cell-walking path)")
+        return
+
+    with tempfile.NamedTemporaryFile("w", suffix=".html", delete=False, encoding="utf-8") as f:
+        f.write(html)
+        page_path = f.name
+    driver = create_driver(headless=True)
+    try:
+        driver.get(f"file://{page_path}")
+
+        def bulk_with_fetch():
+            return extract_courses_from_html(driver.page_source, "HTR01", "Hunter College", "CSCI")
+
+        _rows_per_second("bulk incl. page_source", bulk_with_fetch, args.repeat)
+        walk_rows, walk_rate = _rows_per_second(
+            "cell-walking (WebDriver)",
+            lambda: extract_courses_from_driver(driver, "HTR01", "Hunter College", "CSCI"),
+            1,
+        )
+    finally:
+        driver.quit()
+        os.unlink(page_path)
+
+    if walk_rows != bulk_rows:
+        print(f"⚠️ Row count mismatch: bulk={bulk_rows} cell-walking={walk_rows}")
+    elif walk_rate:
+        print(f"✅ Bulk parsing is {bulk_rate / walk_rate:,.0f}x faster")
+
+# What save_courses_to_database ran per row before the batched writer, over the first 20 row values
+LEGACY_INSERT_SQL = '''
+    INSERT OR REPLACE INTO courses (
+        id, name, code, instructor, students, collegeId,
+        collegeCode, collegeName, subject, catalogNumber, classNumber,
+        section, title, days, startTime, endTime, location, status, instructionMode
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+# The legacy loader's columns are the first ones of a courses row
+LEGACY_COLUMNS = 19
+
+# Search and meeting index objects, the legacy loader had none to maintain
+INDEX_TABLES = ("courses_fts", "course_meetings")
+INDEX_TRIGGERS = ("courses_fts_delete", "courses_fts_update", "course_meetings_delete", "course_meetings_update")
+
+def synthetic_courses(count):
+    """Yield count distinct course dicts shaped like scraper output"""
+    for i in range(count):
+        yield {
+            "collegeCode": ("HTR01", "BKL01", "QNS01")[i % 3],
+            "collegeName": ("Hunter College", "Brooklyn College", "Queens College")[i % 3],
+            "subject": f"SUB{i % 97}",
+            "catalogNumber": str(10000 + i),
+            "classNumber": None,
+            "section": f"{i % 9 + 1:02d}-LEC\nRegular",
+            "title": f"Course {i % 500}",
+            "days": ("MoWe", "TuTh", "Fr")[i % 3],
+            "startTime": "10:00AM",
+            "endTime": "11:15AM",
+            "instructor": f"Instructor {i % 300}",
+            "location": f"Room {i % 50}",
+            "status": ("Open", "Closed", "Wait List")[i % 3],
+            "instructionMode": "In Person",
+        }
+
+def scratch_database(db_path):
+    """Empty courses database without the search and meeting indexes, the same table for both loaders"""
+    initialize_database(db_path)
+    conn = sqlite3.connect(db_path)
+    for trigger in INDEX_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for table in INDEX_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.commit()
+    conn.close()
+
+def bench_sqlite(args):
+    """Compare the per-row loader with the batched WAL writer"""
+    print(f"📊 SQLite load benchmark: {args.rows} rows, batch size {args.batch_size}")
+    # The writer indexes new rows for search and meeting queries, the legacy loader never did
+    print("  (both without the courses_fts and course_meetings indexes)")
+    with tempfile.TemporaryDirectory() as tmp:
+        if not args.skip_naive:
+            db_path = os.path.join(tmp, "naive.db")
+            scratch_database(db_path)
+            conn = sqlite3.connect(db_path)
+            started = time.perf_counter()
+            for course in synthetic_courses(args.rows):
+                conn.execute(LEGACY_INSERT_SQL, course_to_row(course)[:LEGACY_COLUMNS])
+            conn.commit()
+            elapsed = time.perf_counter() - started
+            conn.close()
+            print(f"  {'per-row execute':<28} {elapsed:>8.2f} s  {args.rows / elapsed:>12,.0f} rows/sec")
+
+        db_path = os.path.join(tmp, "batched.db")
+        scratch_database(db_path)
+        started = time.perf_counter()
+        writer = CourseDbWriter(db_path, args.batch_size)
+        for course in synthetic_courses(args.rows):
+            writer.add(course)
+        writer.close()
+        elapsed = time.perf_counter() - started
+        print(f"  {'batched WAL writer':<28} {elapsed:>8.2f} s  {args.rows / elapsed:>12,.0f} rows/sec")
+
+def _stage(results, name, unit, items, seconds):
+    """Record and print the throughput of one stage"""
+    rate = items / seconds if seconds else float("inf")
+    results[name] = {"items": items, "seconds": round(seconds, 4), "rate": round(rate, 1), "unit": unit}
+    print(f"  {name:<18} {items:>8} {unit:<6} {seconds:>8.3f} s  {rate:>12,.0f} {unit}/sec")
+
+def _calibration_loop(loops=CALIBRATION_LOOPS):
+    """Fixed pure-Python work that doesn't touch the scraper, its speed is the machine's"""
+    table = {}
+    total = 0
+    for i in range(loops):
+        key = f"{i % 997}:{i}"
+        table[key[:5]] = len(key)
+        total += table[key[:5]]
+    return total
+
+def _normalize(extracted):
+    courses = []
+    for college_code, college_name, subject_code, rows in extracted:
+        for fields in rows:
+            course = build_course(fields, college_code, college_name, subject_code)
+            if course:
+                courses.append(course)
+    return courses
+
+def run_suite(rounds, use_driver=False, latency=0.0, repeat=5):
+    """Time every scraper stage over the recorded fixture pages, returns stage results"""
+    # Stages run in turns with the calibration loop, so a busy moment of the machine slows one turn
+    # of each rather than every turn of one stage, and every stage keeps its fastest turn
+    best = {}
+    
+    def timed(name, func):
+        # Like timeit, keep collector pauses triggered by earlier allocations out of the timing
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+        best[name] = min(best.get(name, elapsed), elapsed)
+        return result
+    
+    server, site, base_url = start_fake_server(latency=latency)
+    results = {}
+    try:
+        # Page fetch: college navigation plus one search per subject over the HTTP backend
+        client = GlobalSearchHttpClient(create_http_session(), base_url)
+        colleges = client.discover_colleges()
+        
+        def fetch_round():
+            fetched = []
+            for college_code, college_name in colleges:
+                client.open_college(college_code, college_name)
+                for subject_code, subject_name in client.get_subjects():
+                    page = client.search_subject(subject_code, subject_name)
+                    fetched.append((college_code, college_name, subject_code, page))
+            return fetched
+        
+        pages = []
+        for _ in range(rounds):
+            timed("calibration", _calibration_loop)
+            pages += timed("page_fetch", fetch_round)
+        # As if every round had been as fast as the fastest one
+        _stage(results, "page_fetch", "pages", len(pages), best.get("page_fetch", 0) * rounds)
+        client.session.close()
+
+        # Section expansion needs a real browser against the fake server
+        if use_driver:
+            driver = create_driver(headless=True)
+            try:
+                links = 0
+                elapsed = 0.0
+                for college_code, college_name in discover_colleges(driver, base_url):
+                    open_college(driver, college_code, college_name, base_url)
+                    for subject_code, _ in get_subjects(driver):
+                        search_subject(driver, subject_code)
+                        started = time.perf_counter()
+                        links += expand_all_sections(driver)
+                        elapsed += time.perf_counter() - started
+                        return_to_subjects(driver)
+                _stage(results, "section_expand", "links", links, elapsed)
+            finally:
+                driver.quit()
+    finally:
+        server.shutdown()
+
+    for _ in range(repeat):
+        timed("calibration", _calibration_loop)
+        # Row extraction: HTML to raw cell values
+        extracted = timed("row_extract", lambda: [
+            (college_code, college_name, subject_code, extract_rows_from_html(page))
+            for college_code, college_name, subject_code, page in pages
+        ])
+        # Normalization: parse_days_times / parse_course_code into course dicts
+        courses = timed("normalize", lambda: _normalize(extracted))
+        timed("course_id", lambda: [generate_course_id(course) for course in courses])
+    _stage(results, "row_extract", "rows", sum(len(rows) for *_, rows in extracted), best["row_extract"])
+    _stage(results, "normalize", "rows", len(courses), best["normalize"])
+    _stage(results, "course_id", "rows", len(courses), best["course_id"])
+
+    # SQLite insert: make every round's sections distinct so each row is a real insert
+    per_round = len(courses) // rounds if rounds else 0
+    distinct = [dict(course, section=f"{course['section']}-{i // per_round}") if per_round else course
+                for i, course in enumerate(courses)]
+    
+    def insert(db_path):
+        writer = CourseDbWriter(db_path)
+        for course in distinct:
+            writer.add(course)
+        writer.close()
+    
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        for turn in range(repeat):
+            # A fresh database every turn, so each one inserts every row
+            db_path = os.path.join(tmp, f"bench-{turn}.db")
+            initialize_database(db_path)
+            timed("calibration", _calibration_loop)
+            timed("sqlite_insert", lambda: insert(db_path))
+    _stage(results, "sqlite_insert", "rows", len(distinct), best["sqlite_insert"])
+    _stage(results, "calibration", "ops", CALIBRATION_LOOPS, best["calibration"])
+    return results
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Print each stage against the baseline scaled to this machine, returns the names of stages that regressed"""
+    measured = results["calibration"]["rate"]
+    reference = baseline.get("calibration", {}).get("rate")
+    speed = measured / reference if reference else 1.0
+    if reference:
+        print(f"  machine speed {speed:.0%} of the baseline's ({measured:,.0f} vs {reference:,.0f} ops/sec)")
+    else:
+        print("  baseline has no calibration, comparing absolute rates")
+    regressions = []
+    for name, result in results.items():
+        if name == "calibration":
+            continue
+        expected = baseline.get(name, {}).get("rate")
+        if not expected:
+            print(f"  {name:<18} no baseline")
+            continue
+        ratio = result["rate"] / (expected * speed)
+        regressed = ratio < 1 - tolerance
+        marker = "❌" if regressed else "✅"
+        print(f"  {marker} {name:<18} {ratio:>6.0%} of baseline ({result['rate']:,.0f} vs {expected * speed:,.0f} "
+              f"scaled from {expected:,.0f})")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+def bench_suite(args):
+    """Run the per-stage suite and check it against the stored baseline"""
+    baseline = None
+    rounds = args.rounds
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if rounds < MIN_COMPARE_ROUNDS:
+            print(f"⚠️ Comparing needs at least {MIN_COMPARE_ROUNDS} rounds, running {MIN_COMPARE_ROUNDS}")
+            rounds = MIN_COMPARE_ROUNDS
+    print(f"📊 Scraper stage benchmark: {rounds} rounds over the recorded fixture pages")
+    results = run_suite(rounds, use_driver=args.driver, latency=args.latency_ms / 1000)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"💾 Baseline written to {args.baseline}")
+        return
+
+    if baseline is None:
+        print(f"⚠️ No baseline at {args.baseline}, run with --update-baseline to create one")
+        return
+    print(f"\n📏 Compared to baseline (tolerance {args.tolerance:.0%}):")
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"❌ Regressed stages: {', '.join(regressions)}")
+        sys.exit(1)
+    print("✅ No stage regressed")
+
+def _traced_bytes(build):
+    """Bytes still allocated by the objects build() returns"""
+    tracemalloc.start()
+    kept = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+def _index_sections(rows):
+    """SectionIndex of one college's rows, the courses themselves are dropped like in a crawl"""
+    index = SectionIndex()
+    index.begin_unit(TERM_CODE, "HTR01")
+    for fields in rows:
+        index.add(build_course(fields, "HTR01", "Hunter College", "CSCI"))
+    # Starting the next unit releases the per unit repeat check, the sections stay
+    index.begin_unit(TERM_CODE, "HTR01")
+    return index
+
+def _crawl_peak(units, courses_per_page, sections_per_course, per_college, tmp, depth):
+    """Peak traced memory and section count of streaming `units` distinct subject pages into the sinks"""
+    db_path = os.path.join(tmp, f"memory-{units}.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        initialize_database(db_path)
+    sink = JsonlSink(os.path.join(tmp, f"memory-{units}.jsonl")).open(truncate=True)
+    writer = CourseDbWriter(db_path)
+    collector = CrawlCollector(sink, None, writer)
+    work = [(TERM_CODE, f"C{i // per_college:03d}", f"College {i // per_college}", f"S{i:05d}", f"Subject {i}")
+            for i in range(units)]
+    page_rows = courses_per_page * sections_per_course
+
+    def fetch(unit, fresh):
+        # Every subject lists its own sections, as in a real college
+        return build_results_page(courses_per_page, sections_per_course, 10000 + int(unit[3][1:]) * page_rows)
+
+    tracemalloc.start()
+    pipeline = CrawlPipeline(fetch, work, 1, None, depth)
+    sections = 0
+    for unit, courses, error, page_hash in pipeline.results():
+        sections += collector.add_unit(unit, courses)
+        del courses
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Stage spans are per subject telemetry, not crawl data
+    spans.drain()
+    sink.close()
+    with contextlib.redirect_stdout(io.StringIO()):
+        writer.close()
+    return peak, sections
+
+def bench_memory(args):
+    """Record size and peak crawl memory as the number of sections grows"""
+    html = build_results_page(args.courses, args.sections)
+    # Cell values are extracted up front, both sides only pay for what normalization adds
+    rows = [fields for _ in range(20) for fields in extract_rows_from_html(html)]
+    count = len(rows)
+    record_bytes = _traced_bytes(lambda: [build_course(fields, "HTR01", "Hunter College", "CSCI")
+                                          for fields in rows])
+    dict_bytes = _traced_bytes(lambda: [dict(build_course(fields, "HTR01", "Hunter College", "CSCI"))
+                                        for fields in rows])
+    print(f"📊 Memory benchmark ({count} sections)")
+    print(f"  {'course dict':<28} {dict_bytes / count:>8.0f} bytes/section")
+    print(f"  {'CourseRecord':<28} {record_bytes / count:>8.0f} bytes/section")
+
+    # The cross-listing index keeps every section of the college being crawled until the next college
+    college_rows = extract_rows_from_html(build_results_page(args.courses * 20, args.sections))
+    index_bytes = _traced_bytes(lambda: _index_sections(college_rows))
+    print(f"  {'cross-listing index':<28} {index_bytes / len(college_rows):>8.0f} bytes/section of the current college")
+
+    print(f"\n📈 Peak memory streaming {args.courses * args.sections} sections per subject, "
+          f"{args.subjects_per_college} subjects per college (queue depth {args.queue_depth}):")
+    peaks = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for units in args.units:
+            peak, sections = _crawl_peak(units, args.courses, args.sections, args.subjects_per_college, tmp,
+                                         args.queue_depth)
+            peaks.append(peak)
+            print(f"  {units:>6} subjects {sections:>9} sections  peak {peak / 1024 / 1024:>7.2f} MiB  "
+                  f"({dict_bytes / count * sections / 1024 / 1024:,.1f} MiB if kept as dicts)")
+
+    growth = peaks[-1] / peaks[0] - 1
+    if growth > args.tolerance:
+        print(f"❌ Peak memory grew {growth:.0%} with the number of sections (tolerance {args.tolerance:.0%})")
+        sys.exit(1)
+    print(f"✅ Peak memory stayed flat ({growth:+.0%} from the smallest to the largest crawl)")
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Course scraper benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    extract = subparsers.add_parser("extract", help="bulk HTML parsing vs WebDriver cell walking")
+    extract.add_argument("--courses", type=int, default=300)
+    extract.add_argument("--sections", type=int, default=4)
+    extract.add_argument("--repeat", type=int, default=3)
+    extract.add_argument("--driver", action="store_true",
+                         help="also time the cell-walking path in a headless Chrome")
+    extract.set_defaults(func=bench_extract)
+
+    sqlite = subparsers.add_parser("sqlite", help="per-row inserts vs the batched WAL writer")
+    sqlite.add_argument("--rows", type=int, default=100000)
+    sqlite.add_argument("--batch-size", type=int, default=5000)
+    sqlite.add_argument("--skip-naive", action="store_true", help="only time the batched writer")
+    sqlite.set_defaults(func=bench_sqlite)
+
+    suite = subparsers.add_parser("suite", help="per-stage throughput against the fake server and baseline")
+    suite.add_argument("--rounds", type=int, default=20, help="passes over all fixture pages")
+    suite.add_argument("--driver", action="store_true", help="also time section expansion in Chrome")
+    suite.add_argument("--latency-ms", type=float, default=0, help="artificial server latency")
+    suite.add_argument("--baseline", default=BASELINE_FILE)
+    suite.add_argument("--tolerance", type=float, default=0.3,
+                       help="allowed slowdown per stage before failing (0.3 = 30%%)")
+    suite.add_argument("--update-baseline", action="store_true", help="store this run as the baseline")
+    suite.set_defaults(func=bench_suite)
+
+    memory = subparsers.add_parser("memory", help="record size and peak memory of a growing crawl")
+    memory.add_argument("--units", type=int, nargs="+", default=[50, 100, 200, 400],
+                        help="subjects per crawl, smallest first")
+    memory.add_argument("--courses", type=int, default=30)
+    memory.add_argument("--sections", type=int, default=4)
+    memory.add_argument("--subjects-per-college", type=int, default=100,
+                        help="subjects crawled before moving on to the next college")
+    memory.add_argument("--queue-depth", type=int, default=8)
+    memory.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed peak growth from the smallest to the largest crawl (0.25 = 25%%)")
+    memory.set_defaults(func=bench_memory)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    args.func(args)
@@ -0,0 +1,132 @@
+"""
+Search the scraped courses in data/classconnect.db.
+
+Free text goes through the courses_fts full-text index (title, subject,
+instructor, location) and is ranked with bm25, title matches weighing most.
+Term, college, subject, catalog number, status and instruction mode are plain
+column filters served by the courses indexes, and work without any text too.
+
+Usage:
+    python scripts/course_search.py "data structures" [--term 1259] [--college HTR01] [--limit 20]
+    python scripts/course_search.py chen --field instructor --status Open
+    python scripts/course_search.py --college HTR01 --subject CSCI --catalog 127
+    python scripts/course_search.py --rebuild
+"""
+import argparse
+import os
+import re
+import sqlite3
+import time
+
+from scrape_course import SEARCH_COLUMNS, get_data_dir, initialize_database
+
+# bm25 weights in SEARCH_COLUMNS order: title, subject, instructor, location
+SEARCH_WEIGHTS = (10.0, 5.0, 3.0, 1.0)
+
+RESULT_COLUMNS = (
+    'id', 'termCode', 'collegeCode', 'subject', 'catalogNumber', 'section', 'title',
+    'days', 'startTime', 'endTime', 'instructor', 'location', 'status', 'instructionMode'
+)
+
+# Column filters, option name -> courses column
+FILTER_COLUMNS = {
+    'term': 'termCode',
+    'college': 'collegeCode',
+    'subject': 'subject',
+    'catalog': 'catalogNumber',
+    'status': 'status',
+    'mode': 'instructionMode',
+}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+def fts_query(text, field=None):
+    """Turn free text into an FTS5 query: every word must match, as a prefix"""
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    query = ' '.join(f'"{token}"*' for token in tokens)
+    return f'{{{field}}} : ({query})' if field else query
+
+def search_courses(conn, text="", field=None, limit=20, **filters):
+    """Ranked courses matching the text and the column filters, as dicts, none for text without words"""
+    clauses = []
+    params = []
+    for name, value in filters.items():
+        if value is not None:
+            clauses.append(f'c.{FILTER_COLUMNS[name]} = ?')
+            params.append(value)
+
+    columns = ', '.join(f'c.{c}' for c in RESULT_COLUMNS)
+    query = fts_query(text, field) if text.strip() else None
+    if text.strip() and query is None:
+        # Text without a single word (e.g. only punctuation) matches nothing, not every course
+        return []
+    if query:
+        weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+        where = ''.join(f' AND {clause}' for clause in clauses)
+        sql = f'''
+            SELECT {columns}
+            FROM courses_fts f JOIN courses c ON c.rowid = f.rowid
+            WHERE courses_fts MATCH ?{where}
+            ORDER BY bm25(courses_fts, {weights})
+            LIMIT ?
+        '''
+        params = [query, *params]
+    else:
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        sql = f'''
+            SELECT {columns} FROM courses c {where}
+            ORDER BY c.termCode, c.collegeCode, c.subject, c.catalogNumber, c.section
+            LIMIT ?
+        '''
+    rows = conn.execute(sql, (*params, limit)).fetchall()
+    return [dict(zip(RESULT_COLUMNS, row)) for row in rows]
+
+def rebuild_search_index(conn):
+    """Re-index every course from the courses table"""
+    conn.execute("INSERT INTO courses_fts (courses_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO courses_fts (courses_fts) VALUES ('optimize')")
+    conn.commit()
+
+def print_results(results):
+    for course in results:
+        when = f"{course['days'] or ''} {course['startTime'] or ''}-{course['endTime'] or ''}".strip(' -')
+        section = (course['section'] or '').split('\n')[0]
+        print(f"  {course['termCode']} {course['collegeCode']} {course['subject']} {course['catalogNumber']} "
+              f"{section:<10} {course['title']} | {course['instructor']} | {when} | "
+              f"{course['location'] or 'TBA'} | {course['status']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search courses in data/classconnect.db")
+    parser.add_argument("text", nargs="?", default="", help="words to find in title, subject, instructor or location")
+    parser.add_argument("--field", choices=SEARCH_COLUMNS, help="only match the text in this column")
+    parser.add_argument("--term")
+    parser.add_argument("--college", help="college code, e.g. HTR01")
+    parser.add_argument("--subject", help="subject code, e.g. CSCI")
+    parser.add_argument("--catalog", help="catalog number, needs --college and --subject to use the index")
+    parser.add_argument("--status", help="e.g. Open, Closed, Wait List")
+    parser.add_argument("--mode", help="instruction mode, e.g. In Person, Online")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--db", default=None, help="database path (default: data/classconnect.db)")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the full-text index and exit")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(get_data_dir(), "classconnect.db")
+    initialize_database(db_path)
+    conn = sqlite3.connect(db_path)
+    if args.rebuild:
+        started = time.perf_counter()
+        rebuild_search_index(conn)
+        print(f"✅ Rebuilt the course search index in {time.perf_counter() - started:.1f}s")
+    else:
+        started = time.perf_counter()
+        results = search_courses(
+            conn, args.text, args.field, args.limit,
+            term=args.term, college=args.college, subject=args.subject, catalog=args.catalog,
+            status=args.status, mode=args.mode,
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"🔎 {len(results)} courses in {elapsed_ms:.1f} ms")
+        print_results(results)
+    conn.close()
@@ -0,0 +1,194 @@
+"""
+Export the courses in data/classconnect.db as Firestore import shards.
+
+Sections are streamed from SQLite into data/firestore_export/shard-NNNNN.ndjson,
+at most 500 documents per shard so each shard is exactly one Firestore batch.
+Every line carries the document id (the courses.id that import_courses_to_firestore.cjs
+would compute) and either the document fields or a delete. createdAt is the section's
+SQLite creation time, so re-importing a changed section never resets it. manifest.json is written
+last and lists the shards, so the importer never picks up half an export.
+
+With --since-run only the sections added, changed or removed by later scrape runs
+are exported, removed ones as deletes.
+
+Usage:
+    python scripts/export_firestore.py [--terms 1259 1262] [--since-run 12] [--out data/firestore_export]
+    npm run import:courses -- --shards
+"""
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import time
+
+from scrape_course import get_data_dir, initialize_database
+
+# Writes per Firestore batch commit
+FIRESTORE_BATCH_LIMIT = 500
+
+# Firestore document fields in the order the importer writes them, and where they come from
+DOC_COLUMNS = (
+    ('termCode', 'c.termCode'),
+    ('collegeCode', 'c.collegeCode'),
+    ('collegeName', 'c.collegeName'),
+    ('subject', 'c.subject'),
+    ('subjectName', 'f.subjectName'),
+    ('courseCode', 'c.code'),
+    ('catalogNumber', 'c.catalogNumber'),
+    ('classNumber', 'c.classNumber'),
+    ('section', 'c.section'),
+    ('title', 'c.title'),
+    ('days', 'c.days'),
+    ('startTime', 'c.startTime'),
+    ('endTime', 'c.endTime'),
+    ('rawDaysTimes', 'NULL'),
+    ('location', 'c.location'),
+    ('instructor', 'c.instructor'),
+    ('status', 'c.status'),
+    ('instructionMode', 'c.instructionMode'),
+    # When the section first appeared in SQLite, the importer turns it into the document's createdAt
+    ('createdAt', 'c.createdAt'),
+)
+DOC_FIELDS = tuple(field for field, _ in DOC_COLUMNS)
+
+# Course rows with the subject name the crawl listed them under
+COURSE_SELECT = f'''
+    SELECT c.id, {', '.join(column for _, column in DOC_COLUMNS)}
+    FROM courses c
+    LEFT JOIN crawl_frontier f ON f.term = c.termCode AND f.collegeCode = c.collegeCode AND f.subject = c.subject
+'''
+
+def firestore_doc(values):
+    """Document fields of a course row, empty values as null like the JSON importer"""
+    doc = {field: value if value not in (None, '') else None for field, value in zip(DOC_FIELDS, values)}
+    doc['instructor'] = doc['instructor'] or 'TBA'
+    return doc
+
+def _in_terms(terms, column='c.termCode'):
+    return f"{column} IN ({', '.join('?' * len(terms))})" if terms else '1 = 1'
+
+def all_operations(conn, terms=None):
+    """('set', id, doc) for every course of the terms, in term/college/subject order"""
+    rows = conn.execute(f'''
+        {COURSE_SELECT}
+        WHERE {_in_terms(terms)}
+        ORDER BY c.termCode, c.collegeCode, c.subject, c.id
+    ''', tuple(terms or ()))
+    for course_id, *values in rows:
+        yield 'set', course_id, firestore_doc(values)
+
+def changed_operations(conn, since_run, terms=None):
+    """('set', id, doc) for courses added or changed after run since_run, ('delete', id, None) for removed ones"""
+    # A course's current row decides, whatever happened to it in between. Course ids hash the term,
+    # so a removed course's term is the one its changes were logged under
+    rows = conn.execute(f'''
+        WITH changed(courseId, termCode) AS (
+            SELECT courseId, MAX(termCode) FROM course_changes WHERE runId > ? GROUP BY courseId
+        )
+        SELECT changed.courseId, c.id IS NOT NULL, {', '.join(column for _, column in DOC_COLUMNS)}
+        FROM changed
+        LEFT JOIN courses c ON c.id = changed.courseId
+        LEFT JOIN crawl_frontier f ON f.term = c.termCode AND f.collegeCode = c.collegeCode AND f.subject = c.subject
+        WHERE {_in_terms(terms, 'COALESCE(c.termCode, changed.termCode)')}
+        ORDER BY COALESCE(c.termCode, changed.termCode), c.collegeCode, c.subject, changed.courseId
+    ''', (since_run, *(terms or ())))
+    for course_id, exists, *values in rows:
+        if exists:
+            yield 'set', course_id, firestore_doc(values)
+        else:
+            yield 'delete', course_id, None
+
+class ShardWriter:
+    """NDJSON files of at most shard_size operations each, one Firestore batch per file"""
+
+    def __init__(self, out_dir, shard_size=FIRESTORE_BATCH_LIMIT):
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        self.shards = []
+        self.file = None
+        self.count = 0
+        self.counts = {'set': 0, 'delete': 0}
+
+    def clear(self):
+        """Remove the shards and manifest of an earlier export"""
+        os.makedirs(self.out_dir, exist_ok=True)
+        # The manifest goes first, an export interrupted from here on is never imported
+        for path in [*glob.glob(os.path.join(self.out_dir, 'manifest.json')),
+                     *glob.glob(os.path.join(self.out_dir, 'shard-*.ndjson'))]:
+            os.remove(path)
+
+    def write(self, op, course_id, doc):
+        if self.file is None or self.count >= self.shard_size:
+            self._rotate()
+        record = {'op': op, 'id': course_id}
+        if doc is not None:
+            record['data'] = doc
+        self.file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        self.file.write('\n')
+        self.count += 1
+        self.counts[op] += 1
+
+    def _rotate(self):
+        self._close_shard()
+        name = f'shard-{len(self.shards):05d}.ndjson'
+        self.file = open(os.path.join(self.out_dir, name), 'w', encoding='utf-8')
+        self.shards.append({'file': name, 'operations': 0})
+        self.count = 0
+
+    def _close_shard(self):
+        if self.file is not None:
+            self.file.close()
+            self.shards[-1]['operations'] = self.count
+            self.file = None
+
+    def close(self, info):
+        """Finish the last shard and write manifest.json, which marks the export complete"""
+        self._close_shard()
+        manifest = dict(info, shardSize=self.shard_size, sets=self.counts['set'], deletes=self.counts['delete'],
+                        shards=self.shards)
+        path = os.path.join(self.out_dir, 'manifest.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+            f.write('\n')
+        os.replace(path + '.tmp', path)
+        return manifest
+
+def export_firestore(db_path, out_dir, terms=None, since_run=None, shard_size=FIRESTORE_BATCH_LIMIT):
+    """Write the courses (or the changes after since_run) as import shards, returns the manifest"""
+    conn = sqlite3.connect(db_path)
+    try:
+        last_run = conn.execute('SELECT MAX(runId) FROM scrape_runs').fetchone()[0]
+        writer = ShardWriter(out_dir, min(max(1, shard_size), FIRESTORE_BATCH_LIMIT))
+        writer.clear()
+        if since_run is not None:
+            operations = changed_operations(conn, since_run, terms)
+        else:
+            operations = all_operations(conn, terms)
+        for op, course_id, doc in operations:
+            writer.write(op, course_id, doc)
+        return writer.close({'runId': last_run, 'sinceRun': since_run, 'terms': list(terms or [])})
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export data/classconnect.db as Firestore import shards")
+    parser.add_argument("--db", default=None, help="database path (default: data/classconnect.db)")
+    parser.add_argument("--out", default=None, help="shard directory (default: data/firestore_export)")
+    parser.add_argument("--terms", nargs="+", default=None, help="only export these term codes")
+    parser.add_argument("--since-run", type=int, default=None,
+                        help="only export sections added, changed or removed by scrape runs after this run id")
+    parser.add_argument("--shard-size", type=int, default=FIRESTORE_BATCH_LIMIT,
+                        help="documents per shard, at most %(default)s (one Firestore batch)")
+    args = parser.parse_args()
+
+    data_dir = get_data_dir()
+    db_path = args.db or os.path.join(data_dir, "classconnect.db")
+    out_dir = args.out or os.path.join(data_dir, "firestore_export")
+    initialize_database(db_path)
+    started = time.perf_counter()
+    manifest = export_firestore(db_path, out_dir, args.terms, args.since_run, args.shard_size)
+    elapsed = time.perf_counter() - started
+    since = f" changed after run {args.since_run}" if args.since_run is not None else ""
+    print(f"📦 Exported {manifest['sets']} sections and {manifest['deletes']} deletes{since} "
+          f"in {len(manifest['shards'])} shards ({elapsed:.1f}s): {out_dir}")
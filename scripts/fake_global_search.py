@@ -0,0 +1,214 @@
+"""
+Local stand-in for CUNY Global Search.
+
+Serves the start page (term + college checkboxes), the subject selection page
+and recorded results pages from scripts/fixtures/global_search, keeping the
+college/term selection per JSESSIONID cookie like the real site does.
+
+Usage:
+    python scripts/fake_global_search.py [--port 8765] [--latency-ms 0] [--error-rate 0.1] [--expire-rate 0.05]
+    python scripts/scrape_course.py --base-url http://127.0.0.1:8765/CFGlobalSearchTool/CFSearchToolController
+
+--error-rate answers that share of subject searches with a 500, --expire-rate
+drops the session first so the search lands on the start page, for exercising
+the scraper's retries.
+"""
+import argparse
+import html
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "global_search")
+CONTROLLER_PATH = "/CFGlobalSearchTool/CFSearchToolController"
+
+EMPTY_RESULTS_PAGE = """<!DOCTYPE html>
+<html><head><title>CUNY Global Search - Search Results</title></head><body>
+<form name="searchResultsForm" method="post" action="CFSearchToolController">
+<input type="submit" name="new_search_btn" value="New Search">
+<p class="noresults">Your search returned no results.</p>
+</form>
+</body></html>
+"""
+
+def load_catalog(fixtures_dir=FIXTURES_DIR):
+    """Load the terms, colleges and subjects the fake site offers"""
+    with open(os.path.join(fixtures_dir, "catalog.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def render_start_page(catalog):
+    """Term dropdown plus one checkbox per college"""
+    terms = "".join(
+        f'<option value="{code}">{html.escape(name)}</option>' for code, name in catalog["terms"]
+    )
+    checkboxes = "".join(
+        f'<div class="checkbox-inline"><input type="checkbox" name="inst_selection" '
+        f'id="{c["code"]}" value="{c["code"]}"><label for="{c["code"]}">{html.escape(c["name"])}</label></div>\n'
+        for c in catalog["colleges"]
+    )
+    return f"""<!DOCTYPE html>
+<html><head><title>CUNY Global Search</title></head><body>
+<form name="searchform" method="post" action="CFSearchToolController">
+<input type="hidden" name="selectedInstName" value="">
+<select name="term_value" id="t_pd"><option value="">--Select Term--</option>{terms}</select>
+{checkboxes}<input type="submit" name="next_btn" id="search_new_btn" value="Next">
+</form>
+</body></html>
+"""
+
+def render_subject_page(college):
+    """Career and subject dropdowns for one college"""
+    subjects = "".join(
+        f'<option value="{code}">{html.escape(name)}</option>' for code, name in college["subjects"]
+    )
+    return f"""<!DOCTYPE html>
+<html><head><title>CUNY Global Search - {html.escape(college["name"])}</title></head><body>
+<form name="searchform" method="post" action="CFSearchToolController">
+<input type="hidden" name="selectedSubjectName" value="">
+<select name="subject_name" id="subject_ld"><option value="">--Select Subject--</option>{subjects}</select>
+<select name="courseCareer" id="courseCareerId"><option value="">--Select Career--</option>
+<option value="GRAD">Graduate</option><option value="UGRD">Undergraduate</option></select>
+<input type="submit" name="search_btn_search" id="btnGetAjax" value="Search">
+</form>
+</body></html>
+"""
+
+class FakeGlobalSearch:
+    """Per-session state machine of the college -> subject -> results flow"""
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, latency=0.0, error_rate=0.0, expire_rate=0.0):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.error_rate = error_rate
+        self.expire_rate = expire_rate
+        self.catalog = load_catalog(fixtures_dir)
+        self.colleges = {c["code"]: c for c in self.catalog["colleges"]}
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.request_count = 0
+
+    def results_page(self, college_code, subject_code):
+        """Recorded results page for a subject, or the empty results page"""
+        path = os.path.join(self.fixtures_dir, "results", f"{college_code}-{subject_code}.html")
+        if not os.path.exists(path):
+            return EMPTY_RESULTS_PAGE
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def handle(self, session_id, form):
+        """Return the page for a GET (form is None) or a form POST"""
+        with self.lock:
+            self.request_count += 1
+            state = self.sessions.setdefault(session_id, {})
+        if self.latency:
+            time.sleep(self.latency)
+
+        if form is None:
+            state.clear()
+            return 200, render_start_page(self.catalog)
+
+        if "search_btn_search" in form:
+            if random.random() < self.error_rate:
+                return 500, "<html><body>Internal Server Error</body></html>"
+            if random.random() < self.expire_rate:
+                state.clear()
+
+        if "next_btn" in form:
+            selected = form.get("inst_selection", [])
+            if len(selected) != 1 or selected[0] not in self.colleges or not form.get("term_value", [""])[0]:
+                return 200, render_start_page(self.catalog)
+            state["term"] = form["term_value"][0]
+            state["college"] = selected[0]
+            return 200, render_subject_page(self.colleges[state["college"]])
+
+        college = state.get("college")
+        if college is None:
+            # Session expired or never started, the real site falls back to the start page
+            return 200, render_start_page(self.catalog)
+
+        if "search_btn_search" in form:
+            subject = form.get("subject_name", [""])[0]
+            if not subject:
+                return 200, render_subject_page(self.colleges[college])
+            return 200, self.results_page(college, subject)
+
+        # New Search and anything else go back to the subject selection
+        return 200, render_subject_page(self.colleges[college])
+
+def make_handler(site):
+    """Request handler class bound to one FakeGlobalSearch"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes, Nagle would stall keep-alive clients
+        disable_nagle_algorithm = True
+
+        def _session_id(self):
+            for part in self.headers.get("Cookie", "").split(";"):
+                name, _, value = part.strip().partition("=")
+                if name == "JSESSIONID" and value:
+                    return value, False
+            return uuid.uuid4().hex, True
+
+        def _respond(self, form):
+            if urlparse(self.path).path != CONTROLLER_PATH:
+                self.send_error(404)
+                return
+            session_id, is_new = self._session_id()
+            status, body = site.handle(session_id, form)
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=UTF-8")
+            self.send_header("Content-Length", str(len(payload)))
+            if is_new:
+                self.send_header("Set-Cookie", f"JSESSIONID={session_id}; Path=/")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._respond(None)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length).decode("utf-8")
+            self._respond(parse_qs(body, keep_blank_values=True))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def start_fake_server(port=0, latency=0.0, fixtures_dir=FIXTURES_DIR, error_rate=0.0, expire_rate=0.0):
+    """Start the stand-in server on a background thread, returns (server, site, base_url)"""
+    site = FakeGlobalSearch(fixtures_dir=fixtures_dir, latency=latency, error_rate=error_rate, expire_rate=expire_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(site))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}{CONTROLLER_PATH}"
+    return server, site, base_url
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded Global Search pages locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0,
+                        help="artificial delay added to every response")
+    parser.add_argument("--error-rate", type=float, default=0,
+                        help="share of subject searches answered with a 500")
+    parser.add_argument("--expire-rate", type=float, default=0,
+                        help="share of subject searches whose session expires first")
+    args = parser.parse_args()
+
+    server, site, base_url = start_fake_server(args.port, args.latency_ms / 1000,
+                                               error_rate=args.error_rate, expire_rate=args.expire_rate)
+    print(f"🌐 Fake Global Search running at {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
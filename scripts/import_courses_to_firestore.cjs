@@ -4,17 +4,33 @@
  * This script reads cuny_all_courses_raw.json and imports all courses
  * into the Firestore 'courses' collection.
  * 
+ * With --shards it instead streams the NDJSON shards written by
+ * scripts/export_firestore.py, committing one batch per shard and several
+ * shards at a time. Shards carry their document ids and deletes already.
+ * 
  * Usage: npm run import:courses
+ *        npm run import:courses -- --shards [dir] [--concurrency 8]
  */
 
 const admin = require('firebase-admin');
 const fs = require('fs');
 const path = require('path');
 const crypto = require('crypto');
+const readline = require('readline');
 
-// Term code for Fall 2025
+// Term code for Fall 2025, used for courses scraped before records carried their term
 const TERM_CODE = '1259';
 
+// Command line: --shards [dir] and --concurrency N
+const args = process.argv.slice(2);
+const shardsFlag = args.indexOf('--shards');
+const shardsDir = shardsFlag === -1 ? null
+  : (args[shardsFlag + 1] && !args[shardsFlag + 1].startsWith('--')
+    ? path.resolve(args[shardsFlag + 1])
+    : path.join(__dirname, '..', 'data', 'firestore_export'));
+const concurrencyFlag = args.indexOf('--concurrency');
+const CONCURRENCY = concurrencyFlag === -1 ? 8 : Math.max(1, parseInt(args[concurrencyFlag + 1], 10) || 8);
+
 // Initialize Firebase Admin SDK
 let serviceAccount;
 const possibleServiceAccountPaths = [
@@ -56,7 +72,7 @@ const db = admin.firestore();
  */
 function generateCourseId(course) {
   const parts = [
-    TERM_CODE,
+    course.termCode || TERM_CODE,
     course.collegeCode || '',
     course.subject || '',
     course.catalogNumber || '',
@@ -68,6 +84,107 @@ function generateCourseId(course) {
   return hash.substring(0, 12);
 }
 
+/**
+ * Commit [docRef, fields] merge-sets as one batch, stamping createdAt only on documents that do not have one yet
+ */
+async function commitCourses(writes) {
+  const snapshots = await db.getAll(...writes.map(([courseRef]) => courseRef), { fieldMask: ['createdAt'] });
+  const batch = db.batch();
+  writes.forEach(([courseRef, fields], i) => {
+    const data = { ...fields, updatedAt: admin.firestore.FieldValue.serverTimestamp() };
+    if (!snapshots[i].exists || snapshots[i].get('createdAt') == null) {
+      data.createdAt = admin.firestore.FieldValue.serverTimestamp();
+    }
+    batch.set(courseRef, data, { merge: true });
+  });
+  await batch.commit();
+}
+
+/**
+ * Commit one shard as a single batch, reading it line by line
+ */
+async function importShard(file) {
+  const batch = db.batch();
+  const lines = readline.createInterface({
+    input: fs.createReadStream(file, { encoding: 'utf8' }),
+    crlfDelay: Infinity
+  });
+  let sets = 0;
+  let deletes = 0;
+  for await (const line of lines) {
+    if (!line) continue;
+    const record = JSON.parse(line);
+    const courseRef = db.collection('courses').doc(record.id);
+    if (record.op === 'delete') {
+      batch.delete(courseRef);
+      deletes++;
+    } else {
+      // createdAt comes from SQLite and is the same on every export, an update only moves updatedAt
+      const { createdAt, ...fields } = record.data;
+      if (createdAt) {
+        fields.createdAt = admin.firestore.Timestamp.fromDate(new Date(`${createdAt.replace(' ', 'T')}Z`));
+      }
+      batch.set(courseRef, {
+        ...fields,
+        updatedAt: admin.firestore.FieldValue.serverTimestamp()
+      }, { merge: true });
+      sets++;
+    }
+  }
+  await batch.commit();
+  return { sets, deletes };
+}
+
+/**
+ * Import the shards listed in the export manifest, CONCURRENCY shards at a time
+ */
+async function importShards(dir) {
+  const manifestPath = path.join(dir, 'manifest.json');
+  if (!fs.existsSync(manifestPath)) {
+    console.error(`❌ Error: ${manifestPath} not found!`);
+    console.log('\nRun python scripts/export_firestore.py first');
+    process.exit(1);
+  }
+  const manifest = JSON.parse(fs.readFileSync(manifestPath, 'utf8'));
+  const shards = manifest.shards;
+  const since = manifest.sinceRun != null ? ` changed after run ${manifest.sinceRun}` : '';
+  console.log(`📂 Importing ${shards.length} shards from ${dir} (run ${manifest.runId}${since}), ${CONCURRENCY} at a time\n`);
+  
+  let next = 0;
+  let done = 0;
+  let sets = 0;
+  let deletes = 0;
+  const failed = [];
+  async function worker() {
+    while (next < shards.length) {
+      const shard = shards[next++];
+      try {
+        const counts = await importShard(path.join(dir, shard.file));
+        sets += counts.sets;
+        deletes += counts.deletes;
+      } catch (error) {
+        console.error(`  ⚠️ Error importing ${shard.file}:`, error.message);
+        failed.push(shard.file);
+      }
+      done++;
+      if (done % 10 === 0 || done === shards.length) {
+        console.log(`  ✓ Imported ${done}/${shards.length} shards (${Math.round((done / shards.length) * 100)}%)`);
+      }
+    }
+  }
+  await Promise.all(Array.from({ length: Math.min(CONCURRENCY, shards.length) }, worker));
+  
+  console.log(`\n${'='.repeat(60)}`);
+  console.log(`✅ Imported ${sets} courses and deleted ${deletes} from ${shards.length - failed.length} shards`);
+  console.log(`   Collection: courses`);
+  if (failed.length > 0) {
+    console.log(`   Failed shards (${failed.length}): ${failed.join(', ')}`);
+    console.log(`${'='.repeat(60)}\n`);
+    throw new Error(`${failed.length} shards failed, re-run the import to retry them`);
+  }
+  console.log(`${'='.repeat(60)}\n`);
+}
+
 /**
  * Main import function
  */
@@ -110,7 +227,7 @@ async function importCourses() {
     
     console.log(`\n📚 Starting import of ${coursesData.length} courses to Firestore...\n`);
     
-    let batch = db.batch();
+    let writes = [];
     let batchCount = 0;
     let totalImported = 0;
     let skipped = 0;
@@ -126,7 +243,7 @@ async function importCourses() {
         
         // Prepare course data for Firestore
         const firestoreCourse = {
-          termCode: TERM_CODE,
+          termCode: course.termCode || TERM_CODE,
           collegeCode: course.collegeCode || null,
           collegeName: course.collegeName || null,
           subject: course.subject || null,
@@ -143,23 +260,21 @@ async function importCourses() {
           location: course.location || null,
           instructor: course.instructor || 'TBA',
           status: course.status || null,
-          instructionMode: course.instructionMode || null,
-          createdAt: admin.firestore.FieldValue.serverTimestamp(),
-          updatedAt: admin.firestore.FieldValue.serverTimestamp()
+          instructionMode: course.instructionMode || null
         };
         
-        // Use merge: true so re-running the script updates instead of duplicating
-        batch.set(courseRef, firestoreCourse, { merge: true });
+        // Merge-sets so re-running the script updates instead of duplicating, createdAt only for new documents
+        writes.push([courseRef, firestoreCourse]);
         batchCount++;
         
         // Commit batch when it reaches the limit
         if (batchCount >= BATCH_SIZE) {
-          await batch.commit();
+          await commitCourses(writes);
           totalImported += batchCount;
           const percentage = Math.round((totalImported / coursesData.length) * 100);
           console.log(`  ✓ Imported batch: ${totalImported}/${coursesData.length} courses (${percentage}%)`);
           batchCount = 0;
-          batch = db.batch(); // Create new batch
+          writes = []; // Start a new batch
         }
       } catch (error) {
         console.error(`  ⚠️ Error processing course at index ${i}:`, error.message);
@@ -170,7 +285,7 @@ async function importCourses() {
     
     // Commit remaining documents
     if (batchCount > 0) {
-      await batch.commit();
+      await commitCourses(writes);
       totalImported += batchCount;
     }
     
@@ -190,7 +305,7 @@ async function importCourses() {
 }
 
 // Run the import
-importCourses()
+(shardsDir ? importShards(shardsDir) : importCourses())
   .then(() => {
     console.log('🎉 Import completed successfully!');
     process.exit(0);
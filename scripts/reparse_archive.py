@@ -0,0 +1,82 @@
+"""
+Rebuild the course outputs from the raw results page archive.
+
+Re-runs extraction and normalization (parse_days_times, parse_course_code, ...)
+over every page scrape_course.py archived for the given terms, in parallel across cores,
+and rewrites data/cuny_all_courses_raw.jsonl, cuny_all_courses_raw.json and the
+courses table of data/classconnect.db. No browser or network is used.
+
+Usage:
+    python scripts/reparse_archive.py [--workers N] [--gzip] [--terms 1259 1262]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from scrape_course import (
+    TERM_CODE,
+    CourseDbWriter,
+    CrawlCollector,
+    JsonlSink,
+    PageArchive,
+    extract_courses_from_html,
+    finalize_json_array,
+    get_data_dir,
+    initialize_database,
+    output_paths,
+)
+
+_archive = None
+
+def _init_worker(archive_root):
+    global _archive
+    _archive = PageArchive(archive_root)
+
+def _parse_entry(entry):
+    """Parse one archived page back into course dicts"""
+    (term, college_code, college_name, subject_code, subject_name), digest = entry
+    return extract_courses_from_html(_archive.get(digest), college_code, college_name, subject_code, term)
+
+def reparse_archive(workers=None, compress=False, terms=(TERM_CODE,), batch_size=5000):
+    """Rebuild JSONL, JSON and SQLite outputs from the archived pages of the terms"""
+    data_dir = get_data_dir()
+    db_path = os.path.join(data_dir, "classconnect.db")
+    archive_root = os.path.join(data_dir, "page_archive")
+    initialize_database(db_path)
+
+    index = PageArchive(archive_root, db_path)
+    entries = index.entries(terms)
+    index.close()
+    if not entries:
+        print(f"⚠️ No archived pages for terms {', '.join(terms)} in {archive_root}")
+        return
+
+    output_file, stream_file = output_paths(data_dir, compress)
+    sink = JsonlSink(stream_file).open(truncate=True)
+    db_writer = CourseDbWriter(db_path, batch_size, terms)
+    # No frontier: the units were crawled already, this only rebuilds their outputs
+    collector = CrawlCollector(sink, None, db_writer)
+
+    started = time.perf_counter()
+    print(f"🔄 Reparsing {len(entries)} archived pages on {workers or os.cpu_count()} processes")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(archive_root,)) as executor:
+        # map yields results in archive (crawl) order, so the output order is deterministic
+        for (unit, _), courses in zip(entries, executor.map(_parse_entry, entries, chunksize=8)):
+            collector.add_unit(unit, courses)
+
+    sink.close()
+    db_writer.close()
+    total_saved = finalize_json_array(stream_file, output_file)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Rebuilt {total_saved} classes from {len(entries)} pages in {elapsed:.1f}s: {output_file}")
+    collector.sections.report()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild course outputs from data/page_archive")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: all cores)")
+    parser.add_argument("--gzip", action="store_true", help="write cuny_all_courses_raw.jsonl.gz")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--terms", nargs="+", default=[TERM_CODE], help="term codes to rebuild")
+    args = parser.parse_args()
+    reparse_archive(workers=args.workers, compress=args.gzip, terms=args.terms, batch_size=max(1, args.batch_size))
@@ -0,0 +1,222 @@
+"""
+Time-window, conflict and free-slot queries over data/classconnect.db.
+
+Every section's meetings are indexed in the course_meetings R*Tree on a weekly
+minute timeline (Monday 00:00 = 0, one entry per meeting day) and the term, so
+overlap queries touch only the meetings near the asked interval and term
+instead of scanning every section. A schedule is a list of course ids as stored in courses.id.
+
+Usage:
+    python scripts/schedule_query.py meets --days Tu --from 1:00PM --to 3:00PM [--term 1259] [--college HTR01]
+    python scripts/schedule_query.py conflicts ID [ID ...] [--term 1259]
+    python scripts/schedule_query.py free ID [ID ...] [--college HTR01 --subject CSCI]
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+from course_search import FILTER_COLUMNS, RESULT_COLUMNS, print_results
+from scrape_course import MINUTES_PER_DAY, WEEK_DAYS, clock_minutes, day_mask, get_data_dir, initialize_database
+
+def parse_clock(text):
+    """Minutes since midnight of '1:00PM' or 24-hour '13:00'"""
+    minutes = clock_minutes(text)
+    if minutes is None:
+        hour, _, minute = text.partition(':')
+        minutes = int(hour) * 60 + int(minute or 0)
+    return minutes
+
+def weekly_intervals(mask, start, end):
+    """(start, end) on the weekly timeline for every day in the mask"""
+    if start is None or end is None or start >= end:
+        return []
+    return [(day * MINUTES_PER_DAY + start, day * MINUTES_PER_DAY + end)
+            for day in range(len(WEEK_DAYS)) if mask & (1 << day)]
+
+def _filter_sql(filters, alias='c'):
+    """AND-ed column filter clauses and their parameters, None values ignored"""
+    clauses = []
+    params = []
+    for name, value in filters.items():
+        if value is not None:
+            clauses.append(f' AND {alias}.{FILTER_COLUMNS[name]} = ?')
+            params.append(value)
+    return ''.join(clauses), params
+
+def _overlapping(conn, intervals, filters):
+    """(interval index, course row) for every section meeting inside one of the weekly intervals"""
+    if not intervals:
+        return []
+    where, params = _filter_sql(filters)
+    if filters.get('term') is not None:
+        where += ' AND m.termMin <= ? AND m.termMax >= ?'
+        params += [int(filters['term'])] * 2
+    columns = ', '.join(f'c.{c}' for c in RESULT_COLUMNS)
+    values = ', '.join('(?, ?, ?)' for _ in intervals)
+    # The interval list drives the join, each row probes the R*Tree with its own bounds
+    sql = f'''
+        WITH probe(n, lo, hi) AS (VALUES {values})
+        SELECT DISTINCT p.n, {columns}
+        FROM probe p
+        JOIN course_meetings m ON m.startMinute < p.hi AND m.endMinute > p.lo
+        JOIN courses c ON c.rowid = m.id / 8
+        WHERE 1 = 1{where}
+    '''
+    flat = [v for i, (lo, hi) in enumerate(intervals) for v in (i, lo, hi)]
+    return [(row[0], dict(zip(RESULT_COLUMNS, row[1:]))) for row in conn.execute(sql, (*flat, *params))]
+
+def sections_meeting(conn, days, start, end, **filters):
+    """Sections that meet on any of the days (e.g. 'TuTh') at some point between start and end minutes"""
+    seen = {}
+    for _, course in _overlapping(conn, weekly_intervals(day_mask(days), start, end), filters):
+        seen.setdefault(course['id'], course)
+    return sorted(seen.values(), key=lambda c: (c['termCode'], c['collegeCode'], c['subject'],
+                                                c['catalogNumber'] or '', c['section'] or ''))
+
+def load_schedule(conn, course_ids):
+    """Course rows plus their meeting times for a list of course ids"""
+    placeholders = ', '.join('?' * len(course_ids))
+    rows = conn.execute(
+        f'SELECT {", ".join(RESULT_COLUMNS)}, dayMask, startMinute, endMinute FROM courses WHERE id IN ({placeholders})',
+        list(course_ids),
+    ).fetchall()
+    schedule = []
+    for row in rows:
+        course = dict(zip(RESULT_COLUMNS, row))
+        course['meetings'] = weekly_intervals(*row[len(RESULT_COLUMNS):])
+        schedule.append(course)
+    return schedule
+
+def _schedule_filters(schedule, filters):
+    """Restrict a query to the schedule's term when it has only one"""
+    terms = {course['termCode'] for course in schedule}
+    if filters.get('term') is None and len(terms) == 1:
+        filters = dict(filters, term=terms.pop())
+    return filters
+
+def find_conflicts(conn, course_ids, **filters):
+    """{course id: sections overlapping it}, for all courses of a schedule in one R*Tree pass"""
+    schedule = load_schedule(conn, course_ids)
+    filters = _schedule_filters(schedule, filters)
+    owners = []
+    intervals = []
+    for course in schedule:
+        for interval in course['meetings']:
+            owners.append(course)
+            intervals.append(interval)
+    # Sections of other terms share the timeline but never conflict
+    conflicts = {course['id']: {} for course in schedule}
+    for n, other in _overlapping(conn, intervals, filters):
+        owner = owners[n]
+        if other['id'] != owner['id'] and other['termCode'] == owner['termCode']:
+            conflicts[owner['id']].setdefault(other['id'], other)
+    return {course_id: list(found.values()) for course_id, found in conflicts.items()}
+
+def free_slots(schedule, day_start=8 * 60, day_end=22 * 60):
+    """{day: [(start, end), ...]} gaps between day_start and day_end that the schedule leaves open"""
+    busy = {day: [] for day in WEEK_DAYS}
+    for course in schedule:
+        for lo, hi in course['meetings']:
+            day = lo // MINUTES_PER_DAY
+            busy[WEEK_DAYS[day]].append((lo % MINUTES_PER_DAY, hi - day * MINUTES_PER_DAY))
+    slots = {}
+    for day, meetings in busy.items():
+        gaps = []
+        cursor = day_start
+        for lo, hi in sorted(meetings):
+            if lo > cursor:
+                gaps.append((cursor, min(lo, day_end)))
+            cursor = max(cursor, hi)
+            if cursor >= day_end:
+                break
+        if cursor < day_end:
+            gaps.append((cursor, day_end))
+        slots[day] = [(lo, hi) for lo, hi in gaps if lo < hi]
+    return slots
+
+def sections_fitting(conn, course_ids, limit=50, **filters):
+    """Timed sections matching the filters that conflict with nothing in the schedule"""
+    schedule = load_schedule(conn, course_ids)
+    filters = _schedule_filters(schedule, filters)
+    terms = {course['termCode'] for course in schedule}
+    intervals = [interval for course in schedule for interval in course['meetings']]
+    # Only sections passing the filters can be candidates, so only those need blocking
+    blocked = {other['id'] for _, other in _overlapping(conn, intervals, filters) if other['termCode'] in terms}
+    blocked.update(course_ids)
+
+    where, params = _filter_sql(filters)
+    columns = ', '.join(f'c.{c}' for c in RESULT_COLUMNS)
+    fitting = []
+    for row in conn.execute(f'''
+        SELECT {columns} FROM courses c
+        WHERE c.startMinute IS NOT NULL AND c.dayMask > 0{where}
+        ORDER BY c.subject, c.catalogNumber, c.section
+    ''', params):
+        course = dict(zip(RESULT_COLUMNS, row))
+        if course['id'] not in blocked and (not terms or course['termCode'] in terms):
+            fitting.append(course)
+            if len(fitting) >= limit:
+                break
+    return fitting
+
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Schedule queries over data/classconnect.db")
+    parser.add_argument("--db", default=None, help="database path (default: data/classconnect.db)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_filters(command):
+        command.add_argument("--term")
+        command.add_argument("--college")
+        command.add_argument("--subject")
+        command.add_argument("--status")
+        command.add_argument("--mode")
+
+    meets = subparsers.add_parser("meets", help="sections meeting on some days within a time window")
+    meets.add_argument("--days", required=True, help="e.g. Tu or MoWe")
+    meets.add_argument("--from", dest="start", required=True, help="e.g. 1:00PM or 13:00")
+    meets.add_argument("--to", dest="end", required=True)
+    add_filters(meets)
+
+    conflicts = subparsers.add_parser("conflicts", help="sections overlapping each course of a schedule")
+    conflicts.add_argument("ids", nargs="+", help="course ids of the schedule")
+    add_filters(conflicts)
+
+    free = subparsers.add_parser("free", help="open time slots of a schedule and sections that fit them")
+    free.add_argument("ids", nargs="+", help="course ids of the schedule")
+    free.add_argument("--limit", type=int, default=20)
+    add_filters(free)
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(get_data_dir(), "classconnect.db")
+    initialize_database(db_path)
+    conn = sqlite3.connect(db_path)
+    filters = {name: getattr(args, name) for name in ("term", "college", "subject", "status", "mode")}
+    started = time.perf_counter()
+
+    if args.command == "meets":
+        results = sections_meeting(conn, args.days, parse_clock(args.start), parse_clock(args.end), **filters)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"🗓️ {len(results)} sections meet {args.days} between {args.start} and {args.end} ({elapsed_ms:.1f} ms)")
+        print_results(results)
+    elif args.command == "conflicts":
+        results = find_conflicts(conn, args.ids, **filters)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"⚔️ Conflicts for {len(results)} courses ({elapsed_ms:.1f} ms)")
+        for course_id, found in results.items():
+            print(f"  {course_id}: {len(found)} overlapping sections")
+            print_results(found[:10])
+    else:
+        schedule = load_schedule(conn, args.ids)
+        slots = free_slots(schedule)
+        fitting = sections_fitting(conn, args.ids, args.limit, **filters)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"🕒 Free slots of {len(schedule)} courses ({elapsed_ms:.1f} ms)")
+        for day, gaps in slots.items():
+            print(f"  {day}: " + ", ".join(f"{format_minutes(lo)}-{format_minutes(hi)}" for lo, hi in gaps))
+        print(f"✅ {len(fitting)} sections fit the schedule")
+        print_results(fitting)
+    conn.close()
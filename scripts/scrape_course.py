@@ -1,12 +1,48 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import Select
+from selenium.webdriver.support.ui import Select, WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
+from bs4 import BeautifulSoup, SoupStrainer
+import requests
+from requests.adapters import HTTPAdapter
+import urllib3
+from urllib3.util.retry import Retry
+from urllib.parse import urljoin
+from contextlib import contextmanager
+from collections import deque
+from collections.abc import Mapping
+import argparse
+import multiprocessing
+import multiprocessing.util
+import threading
+import queue
 import time
 import json
 import os
 import re
 import sqlite3
+import sys
 import hashlib
+import heapq
+import math
+import operator
+import random
+import gzip
+import io
+import zlib
+import tempfile
+import shutil
+
+# psutil is optional, without it browsers are only recycled by subject count
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+GLOBAL_SEARCH_URL = "https://globalsearch.cuny.edu/CFGlobalSearchTool/CFSearchToolController"
+TERM_CODE = "1259"  # 2025 Fall Term
+HTTP_HEADERS = {"User-Agent": "Mozilla/5.0 (ClassConnect course scraper)"}
 
 def parse_days_times(days_times_str):
     """Parse days and times from a string like 'MoWe 10:00AM-11:15AM'"""
@@ -30,6 +66,27 @@ def parse_days_times(days_times_str):
     
     return days, start_time, end_time
 
+# Day bitmask bits, Monday first, matching the day offsets of the weekly minute timeline
+WEEK_DAYS = ('Mo', 'Tu', 'We', 'Th', 'Fr', 'Sa', 'Su')
+MINUTES_PER_DAY = 24 * 60
+
+def day_mask(days):
+    """Bitmask of the meeting days in a string like 'MoWe' (Mo = 1, Tu = 2, ... Su = 64), 0 for TBA"""
+    mask = 0
+    if days:
+        for i, day in enumerate(WEEK_DAYS):
+            if day in days:
+                mask |= 1 << i
+    return mask
+
+def clock_minutes(time_str):
+    """Minutes since midnight of a time like '10:00AM', None if it doesn't parse"""
+    match = re.fullmatch(r'(\d{1,2}):(\d{2})\s*([AP]M)', (time_str or '').strip().upper())
+    if not match:
+        return None
+    hour = int(match.group(1)) % 12 + (12 if match.group(3) == 'PM' else 0)
+    return hour * 60 + int(match.group(2))
+
 def parse_course_code(course_code_str):
     """Parse course code to extract catalog number and class number"""
     catalog_number = None
@@ -49,54 +106,52 @@ def parse_course_code(course_code_str):
     
     return catalog_number, class_number
 
+# College code to college ID, built once instead of on every lookup
+COLLEGE_IDS = {
+    'HTR01': 'hunter',
+    'BKL01': 'brooklyn',
+    'QNS01': 'queens',
+    'NYC01': 'city',
+    'LEH01': 'lehman',
+    'YOR01': 'york',
+    'JJC01': 'johnjay',
+    'MEC01': 'medgar',
+    'NYT01': 'citytech',
+    'BMC01': 'bmcc',
+    'BCC01': 'bcc',
+    'QCC01': 'qcc',
+    'KCC01': 'kingsborough',
+    'LAG01': 'laguardia',
+    'HOS01': 'hostos',
+    'GUT01': 'guttman',
+    'LAW01': 'law',
+    'SPS01': 'sps',
+    'GRD01': 'gradcenter',
+    'JOU01': 'soj',
+    'BRC01': 'baruch'
+}
+
 def get_college_id(college_code):
     """Map college code to college ID"""
-    college_map = {
-        'HTR01': 'hunter',
-        'BKL01': 'brooklyn',
-        'QNS01': 'queens',
-        'NYC01': 'city',
-        'LEH01': 'lehman',
-        'YOR01': 'york',
-        'JJC01': 'johnjay',
-        'MEC01': 'medgar',
-        'NYT01': 'citytech',
-        'BMC01': 'bmcc',
-        'BCC01': 'bcc',
-        'QCC01': 'qcc',
-        'KCC01': 'kingsborough',
-        'LAG01': 'laguardia',
-        'HOS01': 'hostos',
-        'GUT01': 'guttman',
-        'LAW01': 'law',
-        'SPS01': 'sps',
-        'GRD01': 'gradcenter',
-        'JOU01': 'soj',
-        'BRC01': 'baruch'
-    }
-    return college_map.get(college_code, college_code.lower().replace('01', '') if college_code else 'unknown')
+    return COLLEGE_IDS.get(college_code, college_code.lower().replace('01', '') if college_code else 'unknown')
 
 def generate_course_id(course):
-    """Generate a unique course ID"""
+    """Generate a unique course ID, the same one import_courses_to_firestore.cjs uses"""
+    # Format: termCode:collegeCode:subject:catalogNumber:section, MD5, first 12 chars
     parts = [
-        course.get('collegeCode', 'UNKNOWN'),
-        course.get('subject', ''),
-        course.get('catalogNumber', ''),
-        course.get('section', '')
+        course.get('termCode') or TERM_CODE,
+        course.get('collegeCode') or '',
+        course.get('subject') or '',
+        course.get('catalogNumber') or '',
+        course.get('section') or ''
     ]
-    parts = [p for p in parts if p]
-    base = '-'.join(str(p) for p in parts)
+    base = ':'.join(str(p) for p in parts)
     return hashlib.md5(base.encode()).hexdigest()[:12]
 
-def initialize_database(db_path):
-    """Initialize the database schema"""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Create courses table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS courses (
-            id TEXT PRIMARY KEY,
+# Columns of the courses table. rowid is declared so VACUUM keeps it, courses_fts and course_meetings are keyed on it
+COURSES_SCHEMA = '''
+            rowid INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
             name TEXT NOT NULL,
             code TEXT NOT NULL,
             instructor TEXT NOT NULL,
@@ -115,88 +170,891 @@ def initialize_database(db_path):
             location TEXT,
             status TEXT,
             instructionMode TEXT,
+            contentHash TEXT,
+            termCode TEXT,
+            dayMask INTEGER,
+            startMinute INTEGER,
+            endMinute INTEGER,
             createdAt DATETIME DEFAULT CURRENT_TIMESTAMP,
             updatedAt DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+'''
+
+def initialize_database(db_path):
+    """Initialize the database schema"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    # Create courses table
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS courses ({COURSES_SCHEMA})')
+    add_missing_columns(cursor, 'courses', {
+        'contentHash': 'TEXT', 'termCode': 'TEXT',
+        'dayMask': 'INTEGER', 'startMinute': 'INTEGER', 'endMinute': 'INTEGER',
+    })
+    backfill_meeting_times(cursor)
+    declare_course_rowid(cursor)
     
     # Create indexes
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_courses_collegeId ON courses(collegeId)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_courses_collegeCode ON courses(collegeCode)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_courses_term_subject ON courses(termCode, collegeCode, subject)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_courses_college_subject_catalog '
+                   'ON courses(collegeCode, subject, catalogNumber)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_courses_instructionMode ON courses(instructionMode)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_courses_status ON courses(status)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_courses_meeting ON courses(startMinute, endMinute)')
+    create_search_index(cursor)
+    create_meeting_index(cursor)
+    
+    # Rows scraped before courses carried a term all came from the single hardcoded term
+    cursor.execute('UPDATE courses SET termCode = ? WHERE termCode IS NULL', (TERM_CODE,))
+    
+    # Crawl frontier: one row per (term, college, subject) work unit
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS crawl_frontier (
+            term TEXT NOT NULL,
+            collegeCode TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            collegeName TEXT,
+            subjectName TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            rowCount INTEGER,
+            lastError TEXT,
+            createdAt DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updatedAt DATETIME DEFAULT CURRENT_TIMESTAMP,
+            finishedAt DATETIME,
+            PRIMARY KEY (term, collegeCode, subject)
+        )
+    ''')
+    
+    # Index of the content-addressed results page archive
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS page_archive (
+            term TEXT NOT NULL,
+            collegeCode TEXT NOT NULL,
+            collegeName TEXT,
+            subject TEXT NOT NULL,
+            subjectName TEXT,
+            page INTEGER NOT NULL DEFAULT 0,
+            sha256 TEXT NOT NULL,
+            fetchedAt DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (term, collegeCode, subject, page)
+        )
+    ''')
+    
+    # Listings of one physical section under several subjects, grouped by the section's key
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS course_crosslists (
+            term TEXT NOT NULL,
+            collegeCode TEXT NOT NULL,
+            groupId TEXT NOT NULL,
+            courseId TEXT NOT NULL,
+            subject TEXT,
+            catalogNumber TEXT,
+            runId INTEGER,
+            PRIMARY KEY (term, collegeCode, courseId)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_course_crosslists_group ON course_crosslists(groupId)')
+    
+    # Colleges and their subject dropdowns as last listed per term, reused until they expire
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS discovery_colleges (
+            term TEXT NOT NULL,
+            collegeCode TEXT NOT NULL,
+            collegeName TEXT,
+            subjectCount INTEGER,
+            discoveredAt DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (term, collegeCode)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS discovery_subjects (
+            term TEXT NOT NULL,
+            collegeCode TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            subject TEXT NOT NULL,
+            subjectName TEXT,
+            PRIMARY KEY (term, collegeCode, position)
+        )
+    ''')
+    
+    # One row per scrape run and a log of the sections each run added, changed or removed
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scrape_runs (
+            runId INTEGER PRIMARY KEY AUTOINCREMENT,
+            term TEXT,
+            added INTEGER DEFAULT 0,
+            changed INTEGER DEFAULT 0,
+            unchanged INTEGER DEFAULT 0,
+            removed INTEGER DEFAULT 0,
+            startedAt DATETIME DEFAULT CURRENT_TIMESTAMP,
+            finishedAt DATETIME
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS course_changes (
+            runId INTEGER NOT NULL,
+            courseId TEXT NOT NULL,
+            changeType TEXT NOT NULL,
+            collegeCode TEXT,
+            subject TEXT,
+            changedColumns TEXT,
+            changedAt DATETIME DEFAULT CURRENT_TIMESTAMP,
+            termCode TEXT,
+            PRIMARY KEY (runId, courseId)
+        )
+    ''')
+    add_missing_columns(cursor, 'course_changes', {'termCode': 'TEXT'})
     
     conn.commit()
     conn.close()
     print("✅ Database initialized")
 
-def save_courses_to_database(db_path, courses):
-    """Save courses to SQLite database"""
-    if not courses:
-        print("⚠️ No courses to save to database")
+# Columns of courses covered by the courses_fts full-text index
+SEARCH_COLUMNS = ('title', 'subject', 'instructor', 'location')
+
+def create_search_index(cursor):
+    """FTS5 index over the searchable course columns, kept in sync with courses"""
+    if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'courses_fts'").fetchone():
+        return
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'new.{c}' for c in SEARCH_COLUMNS)
+    old_values = ', '.join(f'old.{c}' for c in SEARCH_COLUMNS)
+    try:
+        # External content table: the index stores only tokens, the text stays in courses
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE courses_fts USING fts5(
+                {columns}, content='courses', content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ SQLite has no FTS5 support ({e}), course search will not be available")
+        return
+    # Updates and deletes are synced by triggers. New rows are indexed in bulk by
+    # CourseDbWriter, a per-row insert trigger made loading about 2.5x slower
+    cursor.execute(f'''
+        CREATE TRIGGER courses_fts_delete AFTER DELETE ON courses BEGIN
+            INSERT INTO courses_fts (courses_fts, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER courses_fts_update AFTER UPDATE OF {columns} ON courses BEGIN
+            INSERT INTO courses_fts (courses_fts, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO courses_fts (rowid, {columns}) VALUES (new.rowid, {new_values});
+        END
+    ''')
+    # Index the rows of a database created before the search index existed
+    cursor.execute("INSERT INTO courses_fts (courses_fts) VALUES ('rebuild')")
+
+def backfill_meeting_times(cursor):
+    """Fill dayMask/startMinute/endMinute of rows saved before those columns existed"""
+    rows = cursor.execute(
+        'SELECT rowid, days, startTime, endTime FROM courses WHERE dayMask IS NULL'
+    ).fetchall()
+    cursor.executemany(
+        'UPDATE courses SET dayMask = ?, startMinute = ?, endMinute = ? WHERE rowid = ?',
+        [(day_mask(days), clock_minutes(start), clock_minutes(end), rowid) for rowid, days, start, end in rows],
+    )
+
+def declare_course_rowid(cursor):
+    """Rebuild a courses table from before rowid was declared, whose rowids VACUUM was free to renumber"""
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(courses)')]
+    if 'rowid' in columns:
+        return
+    # The rowids are copied, the indexes and triggers are recreated by initialize_database()
+    cursor.execute('DROP TABLE IF EXISTS courses_fts')
+    cursor.execute('DROP TABLE IF EXISTS course_meetings')
+    cursor.execute(f'CREATE TABLE courses_rowid ({COURSES_SCHEMA})')
+    cursor.execute(f'''
+        INSERT INTO courses_rowid (rowid, {', '.join(columns)})
+        SELECT rowid, {', '.join(columns)} FROM courses
+    ''')
+    cursor.execute('DROP TABLE courses')
+    cursor.execute('ALTER TABLE courses_rowid RENAME TO courses')
+
+def rebuild_indexes(conn):
+    """Repopulate courses_fts and course_meetings from courses, returns the meeting entries indexed"""
+    tables = {name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE name IN ('courses_fts', 'course_meetings')"
+    )}
+    if 'courses_fts' in tables:
+        conn.execute("INSERT INTO courses_fts (courses_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO courses_fts (courses_fts) VALUES ('optimize')")
+    meetings = 0
+    if 'course_meetings' in tables:
+        conn.execute('DELETE FROM course_meetings')
+        meetings = conn.execute(MEETING_INDEX_SQL, (0,)).rowcount
+    conn.commit()
+    return meetings
+
+def create_meeting_index(cursor):
+    """R*Tree of every weekly meeting on a Monday 00:00 based minute timeline and the term, kept in sync with courses"""
+    if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'course_meetings'").fetchone():
+        return
+    try:
+        # One entry per meeting day: id = course rowid * 8 + day, interval = day offset + start/end minute.
+        # The term is a second dimension so queries of one term skip the meetings of all others
+        cursor.execute('CREATE VIRTUAL TABLE course_meetings USING rtree_i32(id, startMinute, endMinute, termMin, termMax)')
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ SQLite has no R*Tree support ({e}), schedule queries will not be available")
         return
+    cursor.execute('CREATE TABLE IF NOT EXISTS week_days (day INTEGER PRIMARY KEY)')
+    cursor.executemany('INSERT OR IGNORE INTO week_days (day) VALUES (?)', [(d,) for d in range(len(WEEK_DAYS))])
     
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    # Like courses_fts: new rows are indexed in bulk by CourseDbWriter, changes by triggers
+    cursor.execute('''
+        CREATE TRIGGER course_meetings_delete AFTER DELETE ON courses BEGIN
+            DELETE FROM course_meetings WHERE id IN (SELECT old.rowid * 8 + day FROM week_days);
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER course_meetings_update AFTER UPDATE OF dayMask, startMinute, endMinute, termCode ON courses BEGIN
+            DELETE FROM course_meetings WHERE id IN (SELECT old.rowid * 8 + day FROM week_days);
+            INSERT INTO course_meetings (id, startMinute, endMinute, termMin, termMax)
+            SELECT new.rowid * 8 + day, day * {MINUTES_PER_DAY} + new.startMinute, day * {MINUTES_PER_DAY} + new.endMinute,
+                   CAST(new.termCode AS INTEGER), CAST(new.termCode AS INTEGER)
+            FROM week_days WHERE new.dayMask & (1 << day) AND new.startMinute < new.endMinute;
+        END
+    ''')
+    cursor.execute(MEETING_INDEX_SQL, (0,))
+
+def add_missing_columns(cursor, table, columns):
+    """Add columns that a database created by an older version of this script lacks"""
+    existing = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+    for name, column_type in columns.items():
+        if name not in existing:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}')
+
+# courses columns in the order course_to_row produces them
+COURSE_COLUMNS = (
+    'id', 'name', 'code', 'instructor', 'students', 'collegeId',
+    'collegeCode', 'collegeName', 'subject', 'catalogNumber', 'classNumber',
+    'section', 'title', 'days', 'startTime', 'endTime', 'location', 'status', 'instructionMode',
+    'termCode', 'dayMask', 'startMinute', 'endMinute'
+)
+
+# Columns covered by contentHash, everything the scraper sets except the id and the student count
+HASHED_COLUMNS = tuple(c for c in COURSE_COLUMNS if c not in ('id', 'students'))
+_HASHED_INDEXES = tuple(COURSE_COLUMNS.index(c) for c in HASHED_COLUMNS)
+_COLUMN_INDEX = {c: i for i, c in enumerate(COURSE_COLUMNS)}
+
+COURSE_INSERT_SQL = f'''
+    INSERT INTO courses ({', '.join(COURSE_COLUMNS)}, contentHash)
+    VALUES ({', '.join('?' * (len(COURSE_COLUMNS) + 1))})
+'''
+
+SEARCH_INDEX_SQL = f'''
+    INSERT INTO courses_fts (rowid, {', '.join(SEARCH_COLUMNS)})
+    SELECT rowid, {', '.join(SEARCH_COLUMNS)} FROM courses WHERE rowid > ?
+'''
+
+MEETING_INDEX_SQL = f'''
+    INSERT INTO course_meetings (id, startMinute, endMinute, termMin, termMax)
+    SELECT c.rowid * 8 + d.day, d.day * {MINUTES_PER_DAY} + c.startMinute, d.day * {MINUTES_PER_DAY} + c.endMinute,
+           CAST(c.termCode AS INTEGER), CAST(c.termCode AS INTEGER)
+    FROM courses c JOIN week_days d ON c.dayMask & (1 << d.day)
+    WHERE c.rowid > ? AND c.startMinute < c.endMinute
+'''
+
+# Pragmas for bulk loading: WAL lets readers keep working while the crawl writes,
+# NORMAL sync is still crash-safe in WAL mode and fsyncs only at checkpoints.
+# Course ids are hashes, so every batch dirties pages all over the table and
+# frequent small checkpoints cost more than a larger WAL file
+BULK_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA wal_autocheckpoint = 10000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+)
+
+def course_to_row(course):
+    """Map a scraped course to a courses table row"""
+    # Plain dict lookups beat a dozen CourseRecord.get() calls
+    course = as_course_dict(course)
     
-    insert_stmt = '''
-        INSERT OR REPLACE INTO courses (
-            id, name, code, instructor, students, collegeId,
-            collegeCode, collegeName, subject, catalogNumber, classNumber,
-            section, title, days, startTime, endTime, location, status, instructionMode
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    '''
+    # Generate course ID
+    course_id = generate_course_id(course)
     
-    saved = 0
-    skipped = 0
+    # Get college ID
+    college_id = get_college_id(course.get('collegeCode', ''))
     
-    for course in courses:
+    # Build course code
+    catalog_num = course.get('catalogNumber', '')
+    subject = course.get('subject', '')
+    course_code = f"{subject} {catalog_num}".strip() if catalog_num else course.get('code', '')
+    
+    # Build course name/title
+    course_name = course.get('title') or course.get('name') or course_code
+    
+    return (
+        course_id,
+        course_name,
+        course_code,
+        course.get('instructor', 'TBA'),
+        0,  # students count
+        college_id,
+        course.get('collegeCode'),
+        course.get('collegeName'),
+        course.get('subject'),
+        course.get('catalogNumber'),
+        course.get('classNumber'),
+        course.get('section'),
+        course.get('title') or course_name,
+        course.get('days'),
+        course.get('startTime'),
+        course.get('endTime'),
+        course.get('location'),
+        course.get('status'),
+        course.get('instructionMode'),
+        course.get('termCode') or TERM_CODE,
+        day_mask(course.get('days')),
+        clock_minutes(course.get('startTime')),
+        clock_minutes(course.get('endTime'))
+    )
+
+def content_hash(row):
+    """Hash of the scraped content of a courses row"""
+    values = (row[i] for i in _HASHED_INDEXES)
+    return hashlib.sha1("\x1f".join("" if v is None else str(v) for v in values).encode()).hexdigest()
+
+class CourseDbWriter:
+    """Buffers course rows and upserts the ones whose content changed, in explicit transactions"""
+    
+    def __init__(self, db_path, batch_size=5000, terms=(TERM_CODE,)):
+        self.batch_size = batch_size
+        # Autocommit mode, transactions are opened explicitly in flush()
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+        for pragma in BULK_PRAGMAS:
+            self.conn.execute(pragma)
+        self.run_id = self.conn.execute('INSERT INTO scrape_runs (term) VALUES (?)', (','.join(terms),)).lastrowid
+        indexes = {name for (name,) in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN ('courses_fts', 'course_meetings')"
+        )}
+        self.search_index = 'courses_fts' in indexes
+        self.meeting_index = 'course_meetings' in indexes
+        self.pending = []
+        self.unit_ids = set()
+        self.crosslists = []
+        self.saved = 0
+        self.added = 0
+        self.changed = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.skipped = 0
+        self.batches = 0
+        self.write_seconds = 0.0
+    
+    def add(self, course):
+        """Queue one course, writing a batch once batch_size rows are pending"""
         try:
-            # Generate course ID
-            course_id = generate_course_id(course)
-            
-            # Get college ID
-            college_id = get_college_id(course.get('collegeCode', ''))
-            
-            # Build course code
-            catalog_num = course.get('catalogNumber', '')
-            subject = course.get('subject', '')
-            course_code = f"{subject} {catalog_num}".strip() if catalog_num else course.get('code', '')
-            
-            # Build course name/title
-            course_name = course.get('title') or course.get('name') or course_code
-            
-            cursor.execute(insert_stmt, (
-                course_id,
-                course_name,
-                course_code,
-                course.get('instructor', 'TBA'),
-                0,  # students count
-                college_id,
-                course.get('collegeCode'),
-                course.get('collegeName'),
-                course.get('subject'),
-                course.get('catalogNumber'),
-                course.get('classNumber'),
-                course.get('section'),
-                course.get('title') or course_name,
-                course.get('days'),
-                course.get('startTime'),
-                course.get('endTime'),
-                course.get('location'),
-                course.get('status'),
-                course.get('instructionMode')
-            ))
-            saved += 1
+            row = course_to_row(course)
         except Exception as e:
             print(f"  ⚠️ Error saving course to database: {e}")
-            skipped += 1
-            continue
+            self.skipped += 1
+            return
+        self.pending.append(row)
+        self.unit_ids.add(row[0])
+        if len(self.pending) >= self.batch_size:
+            self.flush()
     
-    conn.commit()
-    conn.close()
+    def _existing(self, ids):
+        """contentHash and hashed columns of the rows that already exist, by id"""
+        existing = {}
+        columns = ', '.join(HASHED_COLUMNS)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            for row in self.conn.execute(
+                f'SELECT id, contentHash, {columns} FROM courses WHERE id IN ({placeholders})', chunk
+            ):
+                existing[row[0]] = row[1:]
+        return existing
+    
+    def _write(self, rows):
+        """Insert new rows, update only the changed columns of changed rows, skip identical rows"""
+        # Later rows win, like the INSERT OR REPLACE this replaces
+        latest = {row[0]: row for row in rows}
+        existing = self._existing(list(latest))
+        
+        inserts = []
+        updates = {}
+        changes = []
+        counts = {'added': 0, 'changed': 0, 'unchanged': 0}
+        for course_id, row in latest.items():
+            digest = content_hash(row)
+            old = existing.get(course_id)
+            if old is None:
+                inserts.append(row + (digest,))
+                changes.append((self.run_id, course_id, 'added', row[6], row[8], None, row[19]))
+                counts['added'] += 1
+                continue
+            if old[0] == digest:
+                counts['unchanged'] += 1
+                continue
+            changed = tuple(c for c, i, prev in zip(HASHED_COLUMNS, _HASHED_INDEXES, old[1:]) if row[i] != prev)
+            updates.setdefault(changed, []).append(tuple(row[_COLUMN_INDEX[c]] for c in changed)
+                                                   + (digest, course_id))
+            if changed:
+                changes.append((self.run_id, course_id, 'changed', row[6], row[8], ','.join(changed), row[19]))
+                counts['changed'] += 1
+            else:
+                # Row predates contentHash, only the hash is filled in
+                counts['unchanged'] += 1
+        
+        if inserts:
+            last_rowid = self.conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM courses').fetchone()[0]
+            self.conn.executemany(COURSE_INSERT_SQL, inserts)
+            # New rows get rowids above the old maximum, index them in one statement each
+            if self.search_index:
+                self.conn.execute(SEARCH_INDEX_SQL, (last_rowid,))
+            if self.meeting_index:
+                self.conn.execute(MEETING_INDEX_SQL, (last_rowid,))
+        for changed, params in updates.items():
+            assignments = ''.join(f'{c} = ?, ' for c in changed)
+            self.conn.executemany(
+                f'UPDATE courses SET {assignments}contentHash = ?, updatedAt = CURRENT_TIMESTAMP WHERE id = ?',
+                params,
+            )
+        if changes:
+            self.conn.executemany('''
+                INSERT OR IGNORE INTO course_changes
+                    (runId, courseId, changeType, collegeCode, subject, changedColumns, termCode)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', changes)
+        
+        return counts
+    
+    def add_crosslist(self, term, college_code, group_id, course_id, subject, catalog_number):
+        """Queue one listing of a cross-listed section, written with the next flush()"""
+        self.crosslists.append((term, college_code, group_id, course_id, subject, catalog_number, self.run_id))
+    
+    def _write_crosslists(self):
+        rows, self.crosslists = self.crosslists, []
+        self.conn.execute("BEGIN")
+        self.conn.executemany('''
+            INSERT OR REPLACE INTO course_crosslists (term, collegeCode, groupId, courseId, subject, catalogNumber, runId)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        self.conn.execute("COMMIT")
+    
+    def reset_crosslists(self, term, college_code, keep_done=False):
+        """Forget the college's cross-listings before it is crawled, returns its done units' sections with keep_done"""
+        self.flush()
+        self.conn.execute('DELETE FROM course_crosslists WHERE term = ? AND collegeCode = ?', (term, college_code))
+        if not keep_done:
+            return []
+        columns = ('termCode', 'collegeCode', 'subject', 'catalogNumber', 'classNumber', 'section',
+                   'days', 'startTime', 'endTime', 'location', 'instructor')
+        rows = self.conn.execute(f'''
+            SELECT {', '.join(f'c.{column}' for column in columns)}
+            FROM courses c
+            JOIN crawl_frontier f ON f.term = c.termCode AND f.collegeCode = c.collegeCode AND f.subject = c.subject
+            WHERE c.termCode = ? AND c.collegeCode = ? AND f.status = 'done'
+            ORDER BY f.rowid, c.rowid
+        ''', (term, college_code))
+        return [dict(zip(columns, row)) for row in rows]
+    
+    def flush(self):
+        """Write all pending rows in one transaction"""
+        if self.crosslists:
+            self._write_crosslists()
+        if not self.pending:
+            return
+        started = time.perf_counter()
+        rows, self.pending = self.pending, []
+        try:
+            self.conn.execute("BEGIN")
+            results = [self._write(rows)]
+            self.conn.execute("COMMIT")
+        except sqlite3.Error:
+            # Find the bad rows one by one so a single row cannot sink the whole batch
+            self.conn.execute("ROLLBACK")
+            self.conn.execute("BEGIN")
+            results = []
+            for row in rows:
+                try:
+                    self.conn.execute("SAVEPOINT course_row")
+                    results.append(self._write([row]))
+                    self.conn.execute("RELEASE course_row")
+                except sqlite3.Error as e:
+                    self.conn.execute("ROLLBACK TO course_row")
+                    self.conn.execute("RELEASE course_row")
+                    print(f"  ⚠️ Error saving course to database: {e}")
+                    self.skipped += 1
+            self.conn.execute("COMMIT")
+        for counts in results:
+            self.added += counts['added']
+            self.changed += counts['changed']
+            self.unchanged += counts['unchanged']
+            self.saved += sum(counts.values())
+        self.batches += 1
+        self.write_seconds += time.perf_counter() - started
+    
+    def remove_missing(self, unit):
+        """Delete rows of a fully scraped (term, college, subject) unit that were not added since the last call"""
+        # Course ids hash term, college and subject, so a unit only ever has to remember its own ids
+        term, college_code, subject = unit
+        seen, self.unit_ids = self.unit_ids, set()
+        self.flush()
+        removed = []
+        for (course_id,) in self.conn.execute(
+            'SELECT id FROM courses WHERE termCode = ? AND collegeCode = ? AND subject = ?',
+            (term, college_code, subject),
+        ):
+            if course_id not in seen:
+                removed.append((course_id, college_code, subject, term))
+        if not removed:
+            return
+        self.conn.execute("BEGIN")
+        self.conn.executemany('DELETE FROM courses WHERE id = ?', [(r[0],) for r in removed])
+        self.conn.executemany('''
+            INSERT OR IGNORE INTO course_changes (runId, courseId, changeType, collegeCode, subject, termCode)
+            VALUES (?, ?, 'removed', ?, ?, ?)
+        ''', [(self.run_id, *r) for r in removed])
+        self.conn.execute("COMMIT")
+        self.removed += len(removed)
+    
+    def rows_per_second(self):
+        return self.saved / self.write_seconds if self.write_seconds else 0.0
     
-    print(f"✅ Saved {saved} courses to database")
-    if skipped > 0:
-        print(f"⚠️ Skipped {skipped} courses due to errors")
+    def close(self):
+        """Write what is left and report throughput"""
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.execute('''
+            UPDATE scrape_runs SET added = ?, changed = ?, unchanged = ?, removed = ?, finishedAt = CURRENT_TIMESTAMP
+            WHERE runId = ?
+        ''', (self.added, self.changed, self.unchanged, self.removed, self.run_id))
+        self.conn.close()
+        self.conn = None
+        print(f"✅ Saved {self.saved} courses to database "
+              f"({self.batches} batches, {self.rows_per_second():,.0f} rows/sec)")
+        print(f"🔁 Run {self.run_id}: {self.added} added, {self.changed} changed, "
+              f"{self.unchanged} unchanged, {self.removed} removed")
+        if self.skipped > 0:
+            print(f"⚠️ Skipped {self.skipped} courses due to errors")
+
+def save_courses_to_database(db_path, courses, batch_size=5000):
+    """Save courses to SQLite database"""
+    writer = CourseDbWriter(db_path, batch_size)
+    for course in courses:
+        writer.add(course)
+    writer.close()
+
+class CrawlFrontier:
+    """Persistent status of every (term, college, subject) unit, so a crashed crawl can resume"""
+    
+    def __init__(self, db_path, terms=(TERM_CODE,)):
+        self.terms = tuple(terms)
+        self.conn = sqlite3.connect(db_path)
+        self.finished = []
+    
+    def _in_terms(self):
+        return f"term IN ({', '.join('?' * len(self.terms))})"
+    
+    def reset(self):
+        """Forget all units of these terms, for a crawl that starts from scratch"""
+        self.conn.execute(f'DELETE FROM crawl_frontier WHERE {self._in_terms()}', self.terms)
+        self.conn.commit()
+    
+    def add_units(self, units):
+        """Register planned units as pending, keeping the status of units already known"""
+        self.conn.executemany('''
+            INSERT OR IGNORE INTO crawl_frontier (term, collegeCode, collegeName, subject, subjectName)
+            VALUES (?, ?, ?, ?, ?)
+        ''', units)
+        self.conn.commit()
+    
+    def completed(self):
+        """(term, college_code, subject_code) of every unit already done"""
+        rows = self.conn.execute(
+            f"SELECT term, collegeCode, subject FROM crawl_frontier WHERE {self._in_terms()} AND status = 'done'",
+            self.terms,
+        )
+        return set(rows)
+    
+    def college_done(self, term, college_code):
+        """True when the college has known units in the term and all of them are done"""
+        total, done = self.conn.execute(
+            "SELECT COUNT(*), SUM(status = 'done') FROM crawl_frontier WHERE term = ? AND collegeCode = ?",
+            (term, college_code),
+        ).fetchone()
+        return total > 0 and total == done
+    
+    def finish_unit(self, unit, row_count):
+        """Remember a scraped unit, it is marked done by the next commit()"""
+        self.finished.append((row_count, unit[0], unit[1], unit[3]))
+    
+    def commit(self):
+        """Mark the finished units done, call once their courses are saved"""
+        if not self.finished:
+            return
+        self.conn.executemany('''
+            UPDATE crawl_frontier
+            SET status = 'done', attempts = attempts + 1, rowCount = ?, lastError = NULL,
+                finishedAt = CURRENT_TIMESTAMP, updatedAt = CURRENT_TIMESTAMP
+            WHERE term = ? AND collegeCode = ? AND subject = ?
+        ''', self.finished)
+        self.conn.commit()
+        self.finished = []
+    
+    def fail_unit(self, unit, error):
+        """Record a failed attempt, failed units are retried by the next --resume run"""
+        self.conn.execute('''
+            UPDATE crawl_frontier
+            SET status = 'failed', attempts = attempts + 1, lastError = ?, updatedAt = CURRENT_TIMESTAMP
+            WHERE term = ? AND collegeCode = ? AND subject = ?
+        ''', (str(error), unit[0], unit[1], unit[3]))
+        self.conn.commit()
+    
+    def coverage(self):
+        """Per term: unit counts by status, failures by reason and the failed units themselves"""
+        coverage = {term: {"units": 0, "done": 0, "failed": 0, "pending": 0, "reasons": {}, "failed_units": []}
+                    for term in self.terms}
+        for term, status, count in self.conn.execute(
+            f'SELECT term, status, COUNT(*) FROM crawl_frontier WHERE {self._in_terms()} GROUP BY term, status',
+            self.terms,
+        ):
+            coverage[term]["units"] += count
+            coverage[term][status] = coverage[term].get(status, 0) + count
+        for term, college_code, subject, attempts, error in self.conn.execute(
+            f"SELECT term, collegeCode, subject, attempts, lastError FROM crawl_frontier "
+            f"WHERE {self._in_terms()} AND status = 'failed' ORDER BY rowid",
+            self.terms,
+        ):
+            # Scheduler errors read "reason: message"
+            reason = (error or "unknown").split(":", 1)[0]
+            reasons = coverage[term]["reasons"]
+            reasons[reason] = reasons.get(reason, 0) + 1
+            coverage[term]["failed_units"].append({"college": college_code, "subject": subject,
+                                                   "attempts": attempts, "error": error})
+        return coverage
+    
+    def report(self):
+        """Print the share of done units and the failures by reason, per term"""
+        for term, counts in self.coverage().items():
+            share = counts["done"] / counts["units"] if counts["units"] else 0.0
+            reasons = ", ".join(f"{reason}={count}" for reason, count in sorted(counts["reasons"].items()))
+            print(f"🧭 Coverage {term}: {counts['done']}/{counts['units']} units done ({share:.1%}), "
+                  f"failed={counts['failed']}" + (f" ({reasons})" if reasons else "") + f", pending={counts['pending']}")
+            for unit in counts["failed_units"][:10]:
+                print(f"    ❌ {unit['college']} {unit['subject']} after {unit['attempts']} runs: {unit['error']}")
+    
+    def close(self):
+        self.conn.close()
+
+# Hours a college's cached subject list is trusted before it is listed again
+DISCOVERY_TTL_HOURS = 24
+
+class DiscoveryCache:
+    """Colleges and their subject lists per term, so later runs plan their units without listing them again"""
+    
+    def __init__(self, db_path, ttl_hours=DISCOVERY_TTL_HOURS):
+        self.conn = sqlite3.connect(db_path)
+        self.ttl_hours = ttl_hours
+        self.cached = 0
+        self.listed = 0
+        # (term, college_code) -> subject codes planned from the cache, until a fetcher sees the live dropdown
+        self.unverified = {}
+        # (term, college_code) whose cached list turned out wrong
+        self.stale = set()
+    
+    def subjects(self, term, colleges):
+        """{college_code: subjects} of the colleges whose cached list is still fresh and still valid"""
+        if not self.ttl_hours:
+            return {}
+        # Validation against the start page: a college it drops or renames is listed again
+        offered = dict(colleges)
+        cached = {}
+        counts = {}
+        for college_code, college_name, subject_count, subject, subject_name in self.conn.execute('''
+            SELECT c.collegeCode, c.collegeName, c.subjectCount, s.subject, s.subjectName
+            FROM discovery_colleges c
+            LEFT JOIN discovery_subjects s ON s.term = c.term AND s.collegeCode = c.collegeCode
+            WHERE c.term = ? AND c.discoveredAt >= datetime('now', ?)
+            ORDER BY c.collegeCode, s.position
+        ''', (term, f"-{self.ttl_hours * 3600:.0f} seconds")):
+            if offered.get(college_code) != college_name:
+                continue
+            counts[college_code] = subject_count
+            subjects = cached.setdefault(college_code, [])
+            if subject is not None:
+                subjects.append((subject, subject_name))
+        # A list cut short by an interrupted write is listed again too
+        cached = {code: subjects for code, subjects in cached.items() if len(subjects) == counts[code]}
+        for code, subjects in cached.items():
+            self.unverified[(term, code)] = {subject for subject, _ in subjects}
+        return cached
+    
+    def needs_check(self, term, college_code):
+        """True until the live dropdown of a college planned from the cache has been compared"""
+        return (term, college_code) in self.unverified
+    
+    def check(self, term, college_code, subjects):
+        """Compare a dropdown a fetcher opened anyway with the cached list, safe from fetcher threads"""
+        expected = self.unverified.pop((term, college_code), None)
+        if expected is not None and expected != {subject for subject, _ in subjects}:
+            print(f"⚠️ Subjects of {college_code} in {term} changed since they were cached, listing them again next run")
+            self.stale.add((term, college_code))
+    
+    def store(self, term, college_code, college_name, subjects):
+        """Replace the cached subject list of one college"""
+        self.conn.execute('DELETE FROM discovery_subjects WHERE term = ? AND collegeCode = ?', (term, college_code))
+        self.conn.executemany('''
+            INSERT INTO discovery_subjects (term, collegeCode, position, subject, subjectName)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(term, college_code, position, *subject) for position, subject in enumerate(subjects)])
+        self.conn.execute('''
+            INSERT OR REPLACE INTO discovery_colleges (term, collegeCode, collegeName, subjectCount, discoveredAt)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (term, college_code, college_name, len(subjects)))
+        self.conn.commit()
+    
+    def forget(self, colleges):
+        """Drop the cached lists of these (term, college_code) pairs, e.g. after searches of their subjects failed"""
+        for table in ('discovery_subjects', 'discovery_colleges'):
+            self.conn.executemany(f'DELETE FROM {table} WHERE term = ? AND collegeCode = ?', list(colleges))
+        self.conn.commit()
+    
+    def close(self):
+        self.conn.close()
+
+class JsonlSink:
+    """Append-only JSON Lines file of courses, optionally gzip-compressed"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.compressed = path.endswith(".gz")
+        self.raw = None
+        self.file = None
+    
+    def open(self, truncate=False):
+        """Open for appending, or start a new empty file with truncate=True"""
+        self.raw = open(self.path, "wb" if truncate else "ab")
+        if self.compressed:
+            # Each open appends a new gzip member, readers concatenate them transparently
+            self.gzip = gzip.GzipFile(fileobj=self.raw, mode="ab")
+            self.file = io.TextIOWrapper(self.gzip, encoding="utf-8")
+        else:
+            self.file = io.TextIOWrapper(self.raw, encoding="utf-8")
+        return self
+    
+    def write(self, course):
+        self.file.write(json.dumps(as_course_dict(course), ensure_ascii=False))
+        self.file.write("\n")
+    
+    def commit(self):
+        """Flush everything written so far to disk, called at subject boundaries"""
+        self.file.flush()
+        if self.compressed:
+            self.gzip.flush(zlib.Z_SYNC_FLUSH)
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+    
+    def close(self):
+        if self.file is not None:
+            self.commit()
+            self.file.close()
+            self.raw.close()
+            self.file = None
+    
+    def read(self):
+        """Yield the saved courses, stopping at a record torn by a crash"""
+        if not os.path.exists(self.path):
+            return
+        opener = gzip.open if self.compressed else open
+        try:
+            with opener(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        return
+                    yield json.loads(line)
+        except (EOFError, OSError, ValueError, zlib.error):
+            return
+    
+    def recover(self):
+        """Rewrite the file without a torn tail so appending can continue safely, returns record count"""
+        tmp_path = self.path[:-3] + ".tmp.gz" if self.compressed else self.path + ".tmp"
+        tmp = JsonlSink(tmp_path).open(truncate=True)
+        count = 0
+        for course in self.read():
+            tmp.write(course)
+            count += 1
+        tmp.close()
+        os.replace(tmp_path, self.path)
+        return count
+
+def finalize_json_array(jsonl_path, output_file):
+    """Write the legacy JSON array file from a JSONL file in one streaming pass"""
+    tmp_path = output_file + ".tmp"
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for course in JsonlSink(jsonl_path).read():
+            f.write(",\n  " if count else "\n  ")
+            f.write(json.dumps(course, ensure_ascii=False))
+            count += 1
+        f.write("\n]\n" if count else "]\n")
+    os.replace(tmp_path, output_file)
+    return count
+
+class PageArchive:
+    """Content-addressed store of gzipped results pages, indexed by term/college/subject"""
+    
+    def __init__(self, root, db_path=None):
+        self.root = root
+        # Only the process that records the index opens the database
+        self.conn = sqlite3.connect(db_path) if db_path else None
+    
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest + ".html.gz")
+    
+    def put(self, html):
+        """Store a page unless an identical one is already archived, returns its sha256"""
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write under a unique name and rename, so concurrent workers never see half a page
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+    
+    def get(self, digest):
+        with gzip.open(self._object_path(digest), "rb") as f:
+            return f.read().decode("utf-8")
+    
+    def record(self, unit, digest):
+        """Point the unit's index entry at the page it was last scraped from"""
+        self.conn.execute('''
+            INSERT OR REPLACE INTO page_archive (term, collegeCode, collegeName, subject, subjectName, page, sha256)
+            VALUES (?, ?, ?, ?, ?, 0, ?)
+        ''', (*unit, digest))
+        self.conn.commit()
+    
+    def entries(self, terms):
+        """(unit, sha256) of every archived page of the terms, in crawl order"""
+        rows = self.conn.execute(f'''
+            SELECT a.term, a.collegeCode, a.collegeName, a.subject, a.subjectName, a.sha256
+            FROM page_archive a
+            LEFT JOIN crawl_frontier f
+                ON f.term = a.term AND f.collegeCode = a.collegeCode AND f.subject = a.subject
+            WHERE a.term IN ({', '.join('?' * len(terms))})
+            ORDER BY f.rowid IS NULL, f.rowid, a.term, a.collegeCode, a.subject, a.page
+        ''', tuple(terms))
+        return [(tuple(row[:5]), row[5]) for row in rows]
+    
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
 
 def save_courses_to_json(output_file, courses):
     """Save courses to JSON file incrementally"""
@@ -208,8 +1066,1676 @@ def save_courses_to_json(output_file, courses):
         print(f"  ⚠️ Error saving to JSON: {e}")
         return False
 
-def scrape_all_cuny_colleges():
-    """Extract courses for all CUNY colleges and all subjects, save to single JSON file"""
+# Result cell data-labels mapped to the field names used while building a course
+CELL_FIELDS = {
+    "Class": "course_code",
+    "Course Topic": "course_name",
+    "Section": "section",
+    "DaysAndTimes": "days_times",
+    "Room": "room",
+    "Instructor": "instructor",
+    "Instruction Mode": "instruction_mode",
+    "Status": "status",
+}
+
+# Prefer lxml when it is installed, it parses large result pages several times faster
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Course fields in the order they are written to the JSON files
+COURSE_FIELDS = (
+    "termCode", "collegeCode", "collegeName", "subject", "catalogNumber", "classNumber", "section", "title",
+    "days", "startTime", "endTime", "instructor", "location", "status", "instructionMode",
+)
+_COURSE_FIELD_SET = frozenset(COURSE_FIELDS)
+_course_values = operator.attrgetter(*COURSE_FIELDS)
+
+def _shared(value):
+    """Intern a string that repeats across many sections, so records share one copy"""
+    return sys.intern(value) if value else value
+
+class CourseRecord(Mapping):
+    """One scraped section, a read-only mapping stored in __slots__ instead of a per-row dict
+    
+    Term, college, subject, meeting pattern, status and instruction mode strings are
+    interned, every section of a college points at the same few strings.
+    """
+    __slots__ = COURSE_FIELDS
+    
+    def __init__(self, termCode, collegeCode, collegeName, subject, catalogNumber, classNumber, section, title,
+                 days, startTime, endTime, instructor, location, status, instructionMode):
+        self.termCode = _shared(termCode)
+        self.collegeCode = _shared(collegeCode)
+        self.collegeName = _shared(collegeName)
+        self.subject = _shared(subject)
+        self.catalogNumber = catalogNumber
+        self.classNumber = classNumber
+        self.section = section
+        self.title = title
+        self.days = _shared(days)
+        self.startTime = _shared(startTime)
+        self.endTime = _shared(endTime)
+        self.instructor = instructor
+        self.location = location
+        self.status = _shared(status)
+        self.instructionMode = _shared(instructionMode)
+    
+    def __getitem__(self, key):
+        if key not in _COURSE_FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self):
+        return iter(COURSE_FIELDS)
+    
+    def __len__(self):
+        return len(COURSE_FIELDS)
+    
+    # get() and items() are on every row's path to the sinks, skip Mapping's generic versions
+    def get(self, key, default=None):
+        return getattr(self, key) if key in _COURSE_FIELD_SET else default
+    
+    def items(self):
+        return list(zip(COURSE_FIELDS, _course_values(self)))
+    
+    def to_dict(self):
+        return dict(zip(COURSE_FIELDS, _course_values(self)))
+    
+    def __reduce__(self):
+        # Pickled as plain values, unpickling in the parent process interns them there
+        return CourseRecord, _course_values(self)
+    
+    def __repr__(self):
+        return f"CourseRecord({dict(self)!r})"
+
+def as_course_dict(course):
+    """Plain dict of a CourseRecord, course dicts (e.g. read back from JSONL) pass through"""
+    return course.to_dict() if isinstance(course, CourseRecord) else course
+
+def build_course(fields, college_code, college_name, subject_code, term=TERM_CODE):
+    """Build a CourseRecord from extracted cell values, None if the row has no code or name"""
+    course_code = fields.get("course_code", "")
+    course_name = fields.get("course_name", "")
+    
+    # Only process if we have course code and name
+    if not (course_code and course_name):
+        return None
+    
+    # Parse days and times
+    days, start_time, end_time = parse_days_times(fields.get("days_times", ""))
+    
+    # Parse catalog number from course code
+    catalog_number, class_number = parse_course_code(course_code)
+    
+    return CourseRecord(
+        term,
+        college_code,
+        college_name,
+        subject_code,
+        catalog_number,
+        class_number,  # May be None if not available
+        fields.get("section") or None,
+        course_name,
+        days,
+        start_time,
+        end_time,
+        fields.get("instructor") or "TBA",
+        fields.get("room") or None,
+        fields.get("status") or None,
+        fields.get("instruction_mode") or None,
+    )
+
+# <br> renders as a line break in WebDriver's element.text, so keep it as one
+BR_TAG_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+
+def _cell_text(cell):
+    """Text of a result cell, whitespace-normalized like WebDriver's element.text"""
+    lines = (" ".join(line.split()) for line in cell.get_text().splitlines())
+    return "\n".join(line for line in lines if line)
+
+def extract_rows_from_html(html):
+    """Parse every table.classinfo row of a results page into raw cell values by field"""
+    html = BR_TAG_RE.sub("\n", html)
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=SoupStrainer("table", class_="classinfo"))
+    rows = []
+    for table in soup.find_all("table", class_="classinfo"):
+        for row in table.find_all("tr"):
+            fields = {}
+            for cell in row.find_all("td", recursive=False):
+                field = CELL_FIELDS.get(cell.get("data-label"))
+                if field:
+                    cell_text = _cell_text(cell)
+                    if cell_text:
+                        fields[field] = cell_text
+            # Header rows only have <th> cells
+            if fields:
+                rows.append(fields)
+    return rows
+
+def extract_courses_from_html(html, college_code, college_name, subject_code, term=TERM_CODE):
+    """Parse every table.classinfo of a results page into course dicts"""
+    courses = []
+    for fields in extract_rows_from_html(html):
+        course = build_course(fields, college_code, college_name, subject_code, term)
+        if course:
+            courses.append(course)
+    return courses
+
+def extract_courses_from_driver(driver, college_code, college_name, subject_code, term=TERM_CODE):
+    """Walk the visible tables cell by cell over WebDriver (slow, kept for benchmarking)"""
+    courses = []
+    for table in driver.find_elements(By.CSS_SELECTOR, "table.classinfo"):
+        try:
+            for row in table.find_elements(By.CSS_SELECTOR, "tbody tr"):
+                try:
+                    fields = {}
+                    # Extract data from each cell based on data-label
+                    for cell in row.find_elements(By.TAG_NAME, "td"):
+                        field = CELL_FIELDS.get(cell.get_attribute("data-label"))
+                        cell_text = cell.text.strip()
+                        if field and cell_text:
+                            fields[field] = cell_text
+                    course = build_course(fields, college_code, college_name, subject_code, term)
+                    if course:
+                        courses.append(course)
+                except Exception as e:
+                    # Skip bad rows, continue with next row
+                    print(f"    ⚠️ Skipped a {subject_code} row: {e}")
+                    continue
+        except Exception as e:
+            print(f"    Error parsing table: {e}")
+            continue
+    return courses
+
+def is_college_code(value):
+    """College codes are 5 characters (e.g., HTR01, BKL01, QNS01)"""
+    return bool(value) and len(value) == 5 and value[:3].isalpha() and value[3:].isdigit()
+
+def parse_colleges(html):
+    """(college_code, college_name) for every college checkbox of a start page"""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    colleges = []
+    for checkbox in soup.find_all("input", attrs={"type": "checkbox"}):
+        college_code = checkbox.get("value")
+        if not is_college_code(college_code):
+            continue
+        # The label is tied to the checkbox id, or else follows it or shares its parent
+        label = soup.find("label", attrs={"for": checkbox.get("id")}) if checkbox.get("id") else None
+        if label is None:
+            label = checkbox.find_next_sibling("label") or checkbox.parent.find("label")
+        college_name = label.get_text(strip=True) if label else college_code
+        colleges.append((college_code, college_name or college_code))
+    return colleges
+
+def parse_subjects(soup):
+    """(subject_code, subject_name) for every option of a subject page's dropdown"""
+    select = soup.find("select", attrs={"name": "subject_name"})
+    subjects = []
+    for option in select.find_all("option")[1:]:  # Skip first empty option
+        subject_code = option.get("value")
+        subject_name = option.get_text(strip=True)
+        if subject_code and subject_name and subject_name.lower() not in ["none", "select subject", ""]:
+            subjects.append((subject_code, subject_name))
+    return subjects
+
+# Resources the scraper never looks at, blocked over CDP in lean sessions
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico", "*.webp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+]
+
+# (pid, path) of the disk cache shared by every lean session of this process, so a recycled browser starts warm
+_browser_cache = None
+
+def browser_cache_dir():
+    """This process's Chrome disk cache directory, removed when the process exits"""
+    global _browser_cache
+    # Chrome locks its cache directory, parallel workers each need their own
+    if _browser_cache is None or _browser_cache[0] != os.getpid():
+        path = tempfile.mkdtemp(prefix="classconnect-chrome-cache-")
+        # Runs after the worker's session finalizer has quit its browser
+        multiprocessing.util.Finalize(None, shutil.rmtree, args=(path,), kwargs={"ignore_errors": True},
+                                      exitpriority=0)
+        _browser_cache = (os.getpid(), path)
+    return _browser_cache[1]
+
+def create_driver(headless=False, lean=True):
+    """Create a Chrome WebDriver session, with the lean scraping profile unless lean=False"""
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    if lean:
+        # Hand the page over once the DOM is parsed, the waits check for the elements we need
+        options.page_load_strategy = "eager"
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+        for argument in (
+            "--blink-settings=imagesEnabled=false",
+            "--disable-extensions",
+            "--disable-gpu",
+            "--disable-dev-shm-usage",
+            "--disable-background-networking",
+            "--disable-component-update",
+            "--disable-default-apps",
+            "--disable-sync",
+            "--no-first-run",
+            "--mute-audio",
+            f"--disk-cache-dir={browser_cache_dir()}",
+            "--disk-cache-size=104857600",
+        ):
+            options.add_argument(argument)
+    driver = webdriver.Chrome(options=options)
+    if lean:
+        try:
+            # Fonts cannot be switched off by a pref, drop them (and any image) at the network layer.
+            # CSS stays, the expand links and sections_expanded depend on it
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            print(f"⚠️ Could not block images/fonts: {e}")
+    return driver
+
+def browser_rss_mb(driver):
+    """Resident memory of chromedriver and all its browser processes in MB, None without psutil"""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root, *root.children(recursive=True)]
+    except (psutil.Error, AttributeError):
+        return None
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / 2**20
+
+class NavigationError(RuntimeError):
+    """The site did not show the page or form control a crawl step expected"""
+
+class UnitTimeout(TimeoutError):
+    """A work unit used up its time budget"""
+
+# Deadline of the work unit the current thread is fetching, set by UnitScheduler
+_unit_deadline = threading.local()
+
+def unit_time_left(timeout):
+    """The timeout for one blocking step, capped at what is left of the current unit's budget"""
+    deadline = getattr(_unit_deadline, "at", None)
+    if deadline is None:
+        return timeout
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise UnitTimeout("unit time budget used up")
+    return min(timeout, left) if timeout else left
+
+# Selenium's own page-load timeout, what a navigation outside a unit budget gets
+PAGE_LOAD_TIMEOUT = 300.0
+
+def bound_page_load(driver, timeout=PAGE_LOAD_TIMEOUT):
+    """Cap the page load of the driver's next navigation at what is left of the current unit's budget"""
+    driver.set_page_load_timeout(unit_time_left(timeout))
+
+def failure_reason(error):
+    """Short category of a unit failure, for retry logs and the coverage report"""
+    if isinstance(error, (UnitTimeout, TimeoutException, requests.Timeout)):
+        return "timeout"
+    if isinstance(error, requests.exceptions.RetryError):
+        # The adapter's Retry gave up on a run of 5xx responses
+        return "http_5xx"
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return f"http_{error.response.status_code}"
+    if isinstance(error, requests.ConnectionError):
+        # Connect timeouts surface wrapped in urllib3's MaxRetryError
+        cause = getattr(error.args[0], "reason", None) if error.args else None
+        return "timeout" if isinstance(cause, urllib3.exceptions.TimeoutError) else "connection"
+    if isinstance(error, NavigationError):
+        return "navigation"
+    return type(error).__name__
+
+class WaitLayer:
+    """Condition-driven WebDriver waits that record how long each wait actually took"""
+    
+    def __init__(self, timeout=20, poll_frequency=0.1):
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+        self.samples = {}
+        self.timeouts = {}
+    
+    def until(self, driver, name, condition, timeout=None):
+        """Wait until condition(driver) is truthy, raises TimeoutException after the timeout"""
+        started = time.perf_counter()
+        try:
+            timeout = unit_time_left(timeout or self.timeout)
+            return WebDriverWait(driver, timeout, poll_frequency=self.poll_frequency).until(condition)
+        except TimeoutException:
+            self.timeouts[name] = self.timeouts.get(name, 0) + 1
+            raise
+        finally:
+            self.samples.setdefault(name, []).append(time.perf_counter() - started)
+    
+    def drain(self):
+        """Return and clear the recorded samples, for shipping them out of a worker process"""
+        drained = (self.samples, self.timeouts)
+        self.samples, self.timeouts = {}, {}
+        return drained
+    
+    def merge(self, drained):
+        """Add samples drained from another process"""
+        samples, timeouts = drained
+        for name, values in samples.items():
+            self.samples.setdefault(name, []).extend(values)
+        for name, count in timeouts.items():
+            self.timeouts[name] = self.timeouts.get(name, 0) + count
+    
+    def report(self):
+        """Print count, mean, max and total time spent per wait"""
+        if not self.samples:
+            return
+        print(f"⏱️ Wait telemetry (timeout {self.timeout}s):")
+        for name, values in sorted(self.samples.items()):
+            print(f"  {name:<20} n={len(values):<6} avg={sum(values) / len(values):6.2f}s "
+                  f"max={max(values):6.2f}s total={sum(values):8.1f}s timeouts={self.timeouts.get(name, 0)}")
+
+waits = WaitLayer()
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+class StageTimer:
+    """Timing spans around each crawl stage, labelled with college, subject and row count"""
+    
+    def __init__(self):
+        self.spans = []
+        self.queues = {}
+        self.lock = threading.Lock()
+    
+    @contextmanager
+    def span(self, stage, college="", subject="", rows=0):
+        """Time the enclosed block, the yielded dict takes a late `rows` count"""
+        record = {"stage": stage, "college": college, "subject": subject, "rows": rows}
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - started
+            with self.lock:
+                self.spans.append(record)
+    
+    def drain(self):
+        """Return and clear the recorded spans, for shipping them out of a worker process"""
+        with self.lock:
+            drained, self.spans = self.spans, []
+        return drained
+    
+    def merge(self, drained):
+        """Add spans drained from another process"""
+        with self.lock:
+            self.spans.extend(drained)
+    
+    def record_queue(self, name, stats):
+        """Keep the depth statistics of a pipeline queue for the run summary"""
+        with self.lock:
+            self.queues[name] = stats
+    
+    def summary(self, slowest=10):
+        """Count, rows, total, p50, p95 and max per stage, queue depths and the slowest subjects"""
+        with self.lock:
+            spans = list(self.spans)
+            queues = dict(self.queues)
+        stages = {}
+        subjects = {}
+        for record in spans:
+            stages.setdefault(record["stage"], []).append(record)
+            if record["subject"]:
+                key = (record["college"], record["subject"])
+                subjects[key] = subjects.get(key, 0) + record["seconds"]
+        
+        summary = {"stages": {}, "queues": queues, "slowest_subjects": []}
+        for stage, records in sorted(stages.items()):
+            seconds = [r["seconds"] for r in records]
+            summary["stages"][stage] = {
+                "count": len(records),
+                "rows": sum(r["rows"] for r in records),
+                "total": round(sum(seconds), 4),
+                "p50": round(percentile(seconds, 0.50), 4),
+                "p95": round(percentile(seconds, 0.95), 4),
+                "max": round(max(seconds), 4),
+            }
+        for (college, subject), seconds in sorted(subjects.items(), key=lambda item: -item[1])[:slowest]:
+            summary["slowest_subjects"].append({"college": college, "subject": subject, "seconds": round(seconds, 4)})
+        return summary
+    
+    def report(self):
+        """Print the per-stage timing table"""
+        summary = self.summary()
+        if not summary["stages"]:
+            return
+        print("⏱️ Stage timings:")
+        for stage, s in summary["stages"].items():
+            print(f"  {stage:<16} n={s['count']:<6} rows={s['rows']:<8} p50={s['p50']:7.3f}s "
+                  f"p95={s['p95']:7.3f}s max={s['max']:7.3f}s total={s['total']:8.1f}s")
+        for name, q in summary["queues"].items():
+            print(f"  📥 {name:<13} capacity={q['capacity']:<4} max={q['max_depth']:<4} mean={q['mean_depth']:5.1f} "
+                  f"full_wait={q['put_wait']:7.1f}s empty_wait={q['get_wait']:7.1f}s")
+        for entry in summary["slowest_subjects"][:3]:
+            print(f"  🐢 {entry['college']} {entry['subject']}: {entry['seconds']:.2f}s")
+    
+    def write_metrics(self, metrics_dir, run_info=None):
+        """Write scrape_metrics.json and a Prometheus textfile scrape_metrics.prom, returns both paths"""
+        os.makedirs(metrics_dir, exist_ok=True)
+        summary = self.summary()
+        summary.update(run_info or {})
+        json_path = os.path.join(metrics_dir, "scrape_metrics.json")
+        prom_path = os.path.join(metrics_dir, "scrape_metrics.prom")
+        
+        lines = [
+            "# HELP classconnect_scrape_stage_seconds Duration of scraper stage spans in the last run",
+            "# TYPE classconnect_scrape_stage_seconds summary",
+        ]
+        for stage, s in summary["stages"].items():
+            lines.append(f'classconnect_scrape_stage_seconds{{stage="{stage}",quantile="0.5"}} {s["p50"]}')
+            lines.append(f'classconnect_scrape_stage_seconds{{stage="{stage}",quantile="0.95"}} {s["p95"]}')
+            lines.append(f'classconnect_scrape_stage_seconds_sum{{stage="{stage}"}} {s["total"]}')
+            lines.append(f'classconnect_scrape_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+        lines += [
+            "# HELP classconnect_scrape_stage_rows Rows handled per scraper stage in the last run",
+            "# TYPE classconnect_scrape_stage_rows gauge",
+        ]
+        lines += [f'classconnect_scrape_stage_rows{{stage="{stage}"}} {s["rows"]}'
+                  for stage, s in summary["stages"].items()]
+        lines += [
+            "# HELP classconnect_scrape_queue_depth Depth of the crawl pipeline queues in the last run",
+            "# TYPE classconnect_scrape_queue_depth gauge",
+        ]
+        for name, q in summary["queues"].items():
+            lines.append(f'classconnect_scrape_queue_depth{{queue="{name}",stat="max"}} {q["max_depth"]}')
+            lines.append(f'classconnect_scrape_queue_depth{{queue="{name}",stat="mean"}} {q["mean_depth"]}')
+            lines.append(f'classconnect_scrape_queue_depth{{queue="{name}",stat="capacity"}} {q["capacity"]}')
+        lines += [
+            "# HELP classconnect_scrape_queue_wait_seconds Time pipeline stages spent blocked on a full or empty queue",
+            "# TYPE classconnect_scrape_queue_wait_seconds gauge",
+        ]
+        for name, q in summary["queues"].items():
+            lines.append(f'classconnect_scrape_queue_wait_seconds{{queue="{name}",side="put"}} {q["put_wait"]}')
+            lines.append(f'classconnect_scrape_queue_wait_seconds{{queue="{name}",side="get"}} {q["get_wait"]}')
+        lines += [
+            "# HELP classconnect_scrape_subject_seconds Time spent on the slowest subjects in the last run",
+            "# TYPE classconnect_scrape_subject_seconds gauge",
+        ]
+        lines += [f'classconnect_scrape_subject_seconds{{college="{e["college"]}",subject="{e["subject"]}"}} {e["seconds"]}'
+                  for e in summary["slowest_subjects"]]
+        lines += [
+            "# HELP classconnect_scrape_last_run_timestamp_seconds When the last scraper run finished",
+            "# TYPE classconnect_scrape_last_run_timestamp_seconds gauge",
+            f"classconnect_scrape_last_run_timestamp_seconds {int(time.time())}",
+        ]
+        
+        # Write then rename, so the textfile collector never reads a half-written file
+        for path, content in ((json_path, json.dumps(summary, indent=2) + "\n"), (prom_path, "\n".join(lines) + "\n")):
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+        return json_path, prom_path
+
+spans = StageTimer()
+
+def results_rendered(search_btn):
+    """Condition: the results page replaced the search form and its tables are in the DOM"""
+    def condition(driver):
+        if driver.find_elements(By.CSS_SELECTOR, "table.classinfo"):
+            return True
+        # A search without results has no tables, the old form going stale is enough then
+        return EC.staleness_of(search_btn)(driver) and \
+            driver.execute_script("return document.readyState") == "complete"
+    return condition
+
+def sections_expanded(driver):
+    """Condition: every table.classinfo is displayed (one script call instead of one per table)"""
+    return driver.execute_script(
+        "return Array.from(document.querySelectorAll('table.classinfo'))"
+        ".every(function (t) { return t.offsetParent !== null; });"
+    )
+
+def select_term(driver, term=TERM_CODE):
+    """Select the term on the Global Search start page"""
+    term_select = Select(driver.find_element(By.NAME, "term_value"))
+    term_select.select_by_value(term)
+
+def discover_colleges(driver, base_url=GLOBAL_SEARCH_URL):
+    """Return (college_code, college_name) for every college checkbox on the start page"""
+    with spans.span("page_load"):
+        bound_page_load(driver)
+        driver.get(base_url)
+        waits.until(driver, "start_page", EC.presence_of_element_located((By.NAME, "term_value")))
+    # One page source read instead of a lookup per checkbox and label
+    return parse_colleges(driver.page_source)
+
+def open_college(driver, college_code, college_name, base_url=GLOBAL_SEARCH_URL, term=TERM_CODE):
+    """Navigate from the start page to the subject selection page of one college in one term"""
+    with spans.span("page_load", college_code):
+        bound_page_load(driver)
+        driver.get(base_url)
+        waits.until(driver, "start_page", EC.presence_of_element_located((By.NAME, "term_value")))
+    with spans.span("college_select", college_code):
+        select_college(driver, college_code, college_name, term)
+
+def select_college(driver, college_code, college_name, term=TERM_CODE):
+    """Pick the term and one college on the start page and move on to its subject dropdown"""
+    select_term(driver, term)
+    
+    # Select this college (uncheck all first, then check this one)
+    all_checkboxes = driver.find_elements(By.CSS_SELECTOR, "input[type='checkbox']")
+    for cb in all_checkboxes:
+        # Only uncheck college checkboxes (5 char codes like HTR01)
+        if is_college_code(cb.get_attribute("value")) and cb.is_selected():
+            driver.execute_script("arguments[0].click();", cb)
+    
+    # Select the current college
+    college_checkbox = driver.find_element(By.CSS_SELECTOR, f"input[value='{college_code}']")
+    if not college_checkbox.is_selected():
+        driver.execute_script("arguments[0].click();", college_checkbox)
+    print(f"✅ Selected {college_name} ({college_code})")
+    
+    # Click Next to go to subject selection
+    next_btn = driver.find_element(By.NAME, "next_btn")
+    bound_page_load(driver)
+    next_btn.click()
+    waits.until(driver, "subject_dropdown", EC.presence_of_element_located((By.NAME, "subject_name")))
+    
+    # Select Undergraduate
+    try:
+        ug_select = Select(driver.find_element(By.NAME, "courseCareer"))
+        ug_select.select_by_value("UGRD")
+        print("✅ Selected Undergraduate")
+    except:
+        print("⚠️ Could not select Undergraduate, continuing...")
+
+def get_subjects(driver):
+    """Return (subject_code, subject_name) for every option in the subject dropdown"""
+    return parse_subjects(BeautifulSoup(driver.page_source, HTML_PARSER))
+
+def return_to_subjects(driver):
+    """Go back from a results page to the subject dropdown, returns False if the dropdown is gone"""
+    bound_page_load(driver)
+    # Try multiple methods to go back
+    try:
+        # Method 1: Look for "New Search" button
+        new_search_btn = driver.find_elements(By.NAME, "new_search_btn")
+        if new_search_btn and new_search_btn[0].is_displayed():
+            new_search_btn[0].click()
+        else:
+            # Method 2: Look for "Change Search" or similar
+            change_search = driver.find_elements(By.PARTIAL_LINK_TEXT, "Change Search")
+            if change_search:
+                change_search[0].click()
+            else:
+                # Method 3: Use browser back
+                driver.back()
+    except:
+        # Fallback: use browser back
+        try:
+            driver.back()
+        except:
+            pass
+    
+    # Wait for the subject select element to come back
+    try:
+        waits.until(driver, "subject_dropdown", EC.presence_of_element_located((By.NAME, "subject_name")))
+        return True
+    except TimeoutException:
+        return False
+
+def search_subject(driver, subject_code):
+    """Search one subject from the subject selection page and wait for the results"""
+    # Select the subject
+    subject_select = Select(driver.find_element(By.NAME, "subject_name"))
+    subject_select.select_by_value(subject_code)
+    
+    # Click Search button
+    search_btn = driver.find_element(By.NAME, "search_btn_search")
+    bound_page_load(driver)
+    search_btn.click()
+    waits.until(driver, "results_table", results_rendered(search_btn))
+
+def expand_all_sections(driver):
+    """Click every expand link of a results page, wait until all tables are shown, returns the link count"""
+    print("    Expanding all course sections...")
+    expand_buttons = driver.find_elements(By.CSS_SELECTOR, "a[id^='imageDivLink']")
+    
+    for i, btn in enumerate(expand_buttons):
+        try:
+            driver.execute_script("arguments[0].click();", btn)
+            if (i + 1) % 20 == 0 and len(expand_buttons) > 20:
+                print(f"    Clicked {i + 1}/{len(expand_buttons)} expand buttons...")
+        except:
+            continue
+    if expand_buttons:
+        waits.until(driver, "sections_expanded", sections_expanded)
+    return len(expand_buttons)
+
+# Controls of the start and subject selection pages, a results page has neither
+NOT_RESULTS_RE = re.compile(r'name=["\']?(?:subject_name|next_btn)["\'\s/>]')
+
+def check_results_page(html, college_code, subject_code):
+    """Raise NavigationError when a search landed back on the start or subject page, e.g. after the session expired"""
+    if NOT_RESULTS_RE.search(html):
+        raise NavigationError(f"search for {college_code} {subject_code} did not reach the results page")
+    return html
+
+def fetch_subject_page(driver, college_code, subject_code):
+    """Search one subject from the subject selection page and return the fully expanded results page"""
+    with spans.span("subject_search", college_code, subject_code):
+        search_subject(driver, subject_code)
+    with spans.span("expand_all", college_code, subject_code) as span:
+        span["rows"] = expand_all_sections(driver)
+    return check_results_page(driver.page_source, college_code, subject_code)
+
+def scrape_subject(driver, college_code, college_name, subject_code, subject_name, archive=None, term=TERM_CODE):
+    """Search one subject from the subject selection page, returns its courses and archived page hash"""
+    html = fetch_subject_page(driver, college_code, subject_code)
+    
+    # Grab the rendered page once and parse every table locally
+    with spans.span("extract", college_code, subject_code) as span:
+        page_hash = archive.put(html) if archive else None
+        courses = extract_courses_from_html(html, college_code, college_name, subject_code, term)
+        span["rows"] = len(courses)
+    print(f"    Extracted {len(courses)} sections")
+    return courses, page_hash
+
+def plan_units(colleges, list_subjects, term=TERM_CODE, discovery=None):
+    """(term, college, subject) work units of every college in crawl order, listing only colleges the cache lacks"""
+    cached = discovery.subjects(term, colleges) if discovery is not None else {}
+    listed = 0
+    units = []
+    for college_code, college_name in colleges:
+        subjects = cached.get(college_code)
+        if subjects is None:
+            try:
+                subjects = list_subjects(college_code, college_name)
+            except Exception as e:
+                print(f"❌ Could not list subjects for {college_name}: {e}")
+                continue
+            print(f"📚 Found {len(subjects)} subjects for {college_name}")
+            if discovery is not None:
+                discovery.store(term, college_code, college_name, subjects)
+                discovery.listed += 1
+                listed += 1
+        elif discovery is not None:
+            discovery.cached += 1
+        units.extend((term, college_code, college_name, code, name) for code, name in subjects)
+    if discovery is not None:
+        print(f"🗂️ Subject lists of {term}: {len(cached)} colleges from the discovery cache, {listed} listed")
+    return units
+
+def plan_work_units(driver, colleges, base_url=GLOBAL_SEARCH_URL, term=TERM_CODE, discovery=None):
+    """Visit every college the discovery cache lacks and return the term's (term, college, subject) work units"""
+    def list_subjects(college_code, college_name):
+        open_college(driver, college_code, college_name, base_url, term)
+        return get_subjects(driver)
+    return plan_units(colleges, list_subjects, term, discovery)
+
+# Errors of a WebDriver whose browser or chromedriver is gone. Timeouts and missing elements are page state
+DRIVER_ERRORS = (WebDriverException, urllib3.exceptions.HTTPError, ConnectionError)
+PAGE_ERRORS = (TimeoutException, NoSuchElementException)
+
+class BrowserSession:
+    """Chrome session replaced after N subjects, past an RSS limit or once it died, reopening its college on demand"""
+    
+    def __init__(self, headless=False, base_url=GLOBAL_SEARCH_URL, recycle_after=200, max_rss_mb=None, lean=True,
+                 discovery=None):
+        self.headless = headless
+        self.base_url = base_url
+        self.recycle_after = recycle_after
+        self.max_rss_mb = max_rss_mb if psutil is not None else None
+        self.lean = lean
+        self.discovery = discovery
+        self.driver = None
+        self.selection = None  # (term, college_code) whose subject dropdown is reachable
+        self.on_subject_page = False
+        self.subjects = 0
+        self.recycles = 0
+        self.broken = False  # the last driver error may have killed the browser
+        if max_rss_mb and psutil is None:
+            print("⚠️ psutil is not installed, browsers are recycled by subject count only")
+        self.start()
+    
+    def start(self):
+        self.selection = None
+        self.on_subject_page = False
+        self.subjects = 0
+        self.driver = create_driver(headless=self.headless, lean=self.lean)
+        self.broken = False
+    
+    def restart(self):
+        with spans.span("browser_recycle"):
+            self.quit()
+            self.start()
+        self.recycles += 1
+    
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+    
+    def ensure_college(self, college_code, college_name, term=TERM_CODE):
+        """Put the browser on the subject dropdown of a college, reusing the current page when possible"""
+        if self.selection == (term, college_code) and (self.on_subject_page or return_to_subjects(self.driver)):
+            self.on_subject_page = True
+            return
+        self.selection = None
+        open_college(self.driver, college_code, college_name, self.base_url, term)
+        if self.discovery is not None and self.discovery.needs_check(term, college_code):
+            self.discovery.check(term, college_code, get_subjects(self.driver))
+        self.selection = (term, college_code)
+        self.on_subject_page = True
+    
+    def scrape_subject(self, college_code, college_name, subject_code, subject_name, archive=None, term=TERM_CODE,
+                       fresh=False):
+        """scrape_subject() on the college's subject page, recycling the browser afterwards when due"""
+        return self._on_subject_page(college_code, college_name, term, fresh, scrape_subject,
+                                     college_code, college_name, subject_code, subject_name, archive, term)
+    
+    def fetch_page(self, college_code, college_name, subject_code, term=TERM_CODE, fresh=False):
+        """fetch_subject_page() on the college's subject page, recycling the browser afterwards when due"""
+        return self._on_subject_page(college_code, college_name, term, fresh, fetch_subject_page,
+                                     college_code, subject_code)
+    
+    def _on_subject_page(self, college_code, college_name, term, fresh, action, *args):
+        if self.broken or self.driver is None:
+            # The driver failed last time, or its replacement did not launch
+            self.restart()
+            print("♻️ Restarted browser after a driver error")
+        if fresh:
+            # A retry starts over from the start page instead of trusting the current one
+            self.selection = None
+        try:
+            self.ensure_college(college_code, college_name, term)
+            self.on_subject_page = False
+            return action(self.driver, *args)
+        except Exception as e:
+            # Unknown page state, start from the college again next time
+            self.selection = None
+            if isinstance(e, DRIVER_ERRORS) and not isinstance(e, PAGE_ERRORS):
+                self.broken = True
+            raise
+        finally:
+            self.subjects += 1
+            self.recycle_if_due()
+    
+    def recycle_if_due(self):
+        """Restart the browser when it served recycle_after subjects or grew past max_rss_mb"""
+        if self.broken:
+            # Restarted before the next subject
+            return False
+        reason = None
+        if self.recycle_after and self.subjects >= self.recycle_after:
+            reason = f"{self.subjects} subjects"
+        elif self.max_rss_mb:
+            rss = browser_rss_mb(self.driver)
+            if rss is not None and rss > self.max_rss_mb:
+                reason = f"{rss:.0f} MB RSS"
+        if reason is None:
+            return False
+        self.restart()
+        print(f"♻️ Restarted browser after {reason}")
+        return True
+
+# Per-process browser state for parallel workers
+_worker_session = None
+_worker_browser_args = None
+_worker_start_error = None
+_worker_archive = None
+_worker_scheduler = None
+
+class BrowserStartError(RuntimeError):
+    """No worker process could start its browser"""
+
+def _init_worker(headless, base_url, wait_timeout, archive_root, recycle_after, max_rss_mb, policy, max_delay):
+    """Set up one worker process, its browser starts with the first unit and is closed when the worker exits"""
+    global _worker_browser_args, _worker_archive, _worker_scheduler
+    _worker_archive = PageArchive(archive_root) if archive_root else None
+    # One browser per worker, so a failed unit is retried right away in the same process
+    _worker_scheduler = UnitScheduler(policy=policy, throttle=AdaptiveThrottle(max_delay))
+    waits.timeout = wait_timeout
+    # A Chrome that fails to launch here would kill the worker, and the pool would respawn it forever
+    _worker_browser_args = (headless, base_url, recycle_after, max_rss_mb)
+
+def _worker_browser():
+    """This worker's browser, started on first use, None once it failed to start"""
+    global _worker_session, _worker_start_error
+    if _worker_session is None and _worker_start_error is None:
+        try:
+            _worker_session = BrowserSession(*_worker_browser_args)
+        except DRIVER_ERRORS + (OSError,) as e:
+            _worker_start_error = f"browser did not start: {type(e).__name__}: {e}"
+        else:
+            multiprocessing.util.Finalize(_worker_session, _worker_session.quit, exitpriority=10)
+    return _worker_session
+
+def _scrape_unit(unit):
+    """Scrape one (college, subject) work unit inside a worker process"""
+    term, college_code, college_name, subject_code, subject_name = unit
+    session = _worker_browser()
+    if session is None:
+        # The unit fails without an attempt, the parent gives up once every worker is in this state
+        telemetry = (waits.drain(), spans.drain(), _worker_scheduler.drain())
+        return unit, [], _worker_start_error, None, telemetry, os.getpid()
+    
+    # The session reuses the subject page when the previous unit was from the same college and term
+    def scrape(unit, fresh):
+        return session.scrape_subject(college_code, college_name, subject_code, subject_name,
+                                      _worker_archive, term, fresh)
+    
+    result, error = _worker_scheduler.run_inline(scrape, unit)
+    courses, page_hash = result if error is None else ([], None)
+    return unit, courses, error, page_hash, (waits.drain(), spans.drain(), _worker_scheduler.drain()), None
+
+def _merge_worker_telemetry(results, scheduler, workers):
+    """Fold the wait telemetry, stage spans and retry counters shipped back by workers into this process"""
+    dead_workers = set()
+    browsed = False
+    for unit, courses, error, page_hash, (drained_waits, drained_spans, drained_retries), dead in results:
+        waits.merge(drained_waits)
+        spans.merge(drained_spans)
+        scheduler.merge(drained_retries)
+        yield unit, courses, error, page_hash
+        if dead is None:
+            browsed = True
+            continue
+        dead_workers.add(dead)
+        if len(dead_workers) >= workers:
+            raise BrowserStartError(f"none of the {workers} workers could start a browser ({error})")
+    # A worker without a browser fails units fast and may have taken all of them before the others started
+    if dead_workers and not browsed:
+        raise BrowserStartError(f"no unit got a browser ({len(dead_workers)} workers could not start one)")
+
+def _normalized(value):
+    return " ".join(str(value).split()).casefold() if value else ""
+
+def section_key(course):
+    """Digest of the normalized (term, college, section, days/times, location, instructor) of a meeting"""
+    # Cross-listed rows carry their own class numbers (catalogNumber), only the meeting is shared
+    parts = (course.get("termCode") or TERM_CODE, course.get("collegeCode"), course.get("section"),
+             course.get("days"), course.get("startTime"), course.get("endTime"),
+             course.get("location"), course.get("instructor"))
+    return hashlib.md5("\x1f".join(_normalized(part) for part in parts).encode()).hexdigest()[:12]
+
+class SectionIndex:
+    """Physical sections of the college being crawled, to drop repeated rows and group cross-listed ones"""
+    
+    def __init__(self, db_writer=None, seed=False):
+        self.db_writer = db_writer
+        # Only a crawl with a frontier knows which units are done and won't come again
+        self.seed = seed
+        self.scope = None
+        # section key -> (subject, catalogNumber, course id) of its first listing, None once its group is recorded
+        self.sections = {}
+        self.unit_seen = set()
+        self.repeats = 0
+        self.groups = 0
+        self.crosslisted = 0
+    
+    def begin_unit(self, term, college_code):
+        """Start a unit, moving on to a new college drops the previous college's sections"""
+        self.unit_seen = set()
+        if self.scope == (term, college_code):
+            return
+        # Cross-listings never span colleges, and units come grouped by term and college
+        self.scope = (term, college_code)
+        self.sections = {}
+        if self.db_writer is not None:
+            for course in self.db_writer.reset_crosslists(term, college_code, self.seed):
+                self._index(section_key(course), course)
+    
+    def add(self, course):
+        """Index a row of the current unit, False when the unit already listed the same section"""
+        key = section_key(course)
+        listing = (key, course.get("subject"), _normalized(course.get("catalogNumber")))
+        if listing in self.unit_seen:
+            self.repeats += 1
+            return False
+        self.unit_seen.add(listing)
+        self._index(key, course)
+        return True
+    
+    def _index(self, key, course):
+        # TBA and online rows without a meeting time share no room or slot with anything
+        if not course.get("startTime"):
+            return
+        entry = (course.get("subject"), course.get("catalogNumber"), generate_course_id(course))
+        first = self.sections.setdefault(key, entry)
+        if first is None:
+            self._record(key, entry)
+        elif (first[0], _normalized(first[1])) != (entry[0], _normalized(entry[1])):
+            # Another listing (class number) of the same meeting, both join its group
+            self.groups += 1
+            self._record(key, first)
+            self._record(key, entry)
+            self.sections[key] = None
+    
+    def _record(self, key, entry):
+        self.crosslisted += 1
+        if self.db_writer is not None:
+            subject, catalog_number, course_id = entry
+            self.db_writer.add_crosslist(*self.scope, key, course_id, subject, catalog_number)
+    
+    def summary(self):
+        return {"repeats": self.repeats, "crosslisted_sections": self.groups, "crosslisted_listings": self.crosslisted}
+    
+    def report(self):
+        print(f"🔗 Dropped {self.repeats} repeated rows, {self.groups} sections are cross-listed "
+              f"({self.crosslisted} listings in course_crosslists)")
+
+class CrawlCollector:
+    """Streams scraped courses to the JSONL sink and database in crawl order and checkpoints the frontier"""
+    
+    def __init__(self, sink, frontier, db_writer, archive=None):
+        self.sink = sink
+        self.frontier = frontier
+        self.db_writer = db_writer
+        self.archive = archive
+        self.sections = SectionIndex(db_writer, seed=frontier is not None)
+        # Rows already streamed out for units that are not done yet, by (term, college, subject)
+        self.seen = {}
+        self.count = 0
+        self.failed = 0
+    
+    def resume(self):
+        """Pick up the courses an interrupted run already streamed out"""
+        self.count = self.sink.recover()
+        # Completed units are never crawled again, only rows of an unfinished unit can repeat
+        done = self.frontier.completed() if self.frontier is not None else set()
+        for course in self.sink.read():
+            key = (course.get("termCode") or TERM_CODE, course.get("collegeCode"), course.get("subject"))
+            if key not in done:
+                self.seen.setdefault(key, set()).add(tuple(course.items()))
+        self.sink.open()
+    
+    def add_unit(self, unit, courses, page_hash=None):
+        """Write the new courses of a scraped unit and mark it done, returns how many were new"""
+        # Every row carries its unit's term, college and subject, so repeats can only come from the same unit
+        streamed = self.seen.pop((unit[0], unit[1], unit[3]), set())
+        self.sections.begin_unit(unit[0], unit[1])
+        unit_courses = []
+        new_courses = []
+        for course in courses:
+            # Drop repeats of a section the unit already listed, e.g. from a re-expanded page
+            if not self.sections.add(course):
+                continue
+            unit_courses.append(course)
+            # An interrupted run may have streamed the row out already, the database still needs it
+            if not streamed or tuple(course.items()) not in streamed:
+                new_courses.append(course)
+        added = len(new_courses)
+        self.count += added
+        
+        # The unit is done once its rows are on disk
+        with spans.span("json_save", unit[1], unit[3], added):
+            for course in new_courses:
+                self.sink.write(course)
+            self.sink.commit()
+        with spans.span("db_save", unit[1], unit[3], len(unit_courses)):
+            for course in unit_courses:
+                self.db_writer.add(course)
+            # Sections the unit no longer lists are gone from the catalog
+            self.db_writer.remove_missing((unit[0], unit[1], unit[3]))
+        if page_hash:
+            self.archive.record(unit, page_hash)
+        if self.frontier is not None:
+            self.frontier.finish_unit(unit, added)
+            self.frontier.commit()
+        return added
+    
+    def fail_unit(self, unit, error):
+        self.failed += 1
+        if self.frontier is not None:
+            self.frontier.fail_unit(unit, error)
+
+def collect_unit_results(results, total_units, collector):
+    """Stream (unit, courses, error, page_hash) results to the collector in crawl order"""
+    for index, (unit, courses, error, page_hash) in enumerate(results):
+        term, college_code, college_name, subject_code, subject_name = unit
+        if error:
+            collector.fail_unit(unit, error)
+            print(f"    ❌ Error scraping {term} {college_code} {subject_name}: {error}")
+            continue
+        added = collector.add_unit(unit, courses, page_hash)
+        print(f"  ✅ [{index+1}/{total_units}] {term} {college_code} {subject_code}: {added} courses")
+    
+    if collector.failed:
+        print(f"⚠️ {collector.failed} subjects failed")
+
+def pending_units(units, collector):
+    """Register planned units in the frontier and drop the ones a previous run completed"""
+    collector.frontier.add_units(units)
+    done = collector.frontier.completed()
+    # A subject listed twice is crawled once
+    remaining = [unit for unit in dict.fromkeys(units) if (unit[0], unit[1], unit[3]) not in done]
+    if len(remaining) < len(units):
+        print(f"⏭️ Skipping {len(units) - len(remaining)} subjects completed by a previous run")
+    return remaining
+
+class RetryPolicy:
+    """How often and how patiently a failed work unit is tried again"""
+    
+    def __init__(self, attempts=3, backoff=2.0, max_backoff=60.0, unit_timeout=180.0):
+        self.attempts = max(1, attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.unit_timeout = unit_timeout
+    
+    def delay(self, attempt):
+        """Seconds to wait after a failed attempt, exponential with jitter"""
+        return min(self.max_backoff, self.backoff * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+class AdaptiveThrottle:
+    """Spaces out unit fetches across all fetchers, backing off on errors and rising latency
+    
+    A failure doubles the gap between fetch starts, a fast-moving latency average
+    climbing past twice the slow one widens it by half, and every normal fetch
+    shrinks it again by a tenth. max_delay=0 turns the throttle off.
+    """
+    
+    def __init__(self, max_delay=10.0, min_delay=0.0):
+        self.max_delay = max_delay
+        self.min_delay = min_delay
+        self.delay = min_delay
+        self.peak_delay = min_delay
+        self.fast = None
+        self.slow = None
+        self.next_start = 0.0
+        self.waited = 0.0
+        self.lock = threading.Lock()
+    
+    def wait(self, stop=None):
+        """Block until the next fetch may start"""
+        if not self.max_delay:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.delay
+            self.waited += start - now
+        if start > now:
+            if stop is not None:
+                stop.wait(start - now)
+            else:
+                time.sleep(start - now)
+    
+    def _widen(self, factor, floor):
+        self.delay = min(self.max_delay, max(self.delay * factor, floor))
+        self.peak_delay = max(self.peak_delay, self.delay)
+    
+    def success(self, seconds):
+        with self.lock:
+            self.fast = seconds if self.fast is None else 0.7 * self.fast + 0.3 * seconds
+            self.slow = seconds if self.slow is None else 0.98 * self.slow + 0.02 * seconds
+            if self.fast > 2 * self.slow:
+                self._widen(1.5, 0.05)
+            else:
+                self.delay = max(self.min_delay, self.delay * 0.9 - 0.01)
+    
+    def failure(self):
+        with self.lock:
+            self._widen(2.0, 0.5)
+
+class UnitScheduler:
+    """Hands work units to fetchers in crawl order and retries failed ones with exponential backoff
+    
+    A failed unit goes back into the queue with a not-before time instead of being
+    retried on the spot, so other units keep flowing meanwhile, and whichever fetcher
+    picks it up again starts from a fresh navigation. Each attempt runs against the
+    policy's unit_timeout: blocking steps take their timeouts from unit_time_left().
+    """
+    
+    def __init__(self, units=(), policy=None, throttle=None, ahead=None):
+        self.policy = policy or RetryPolicy()
+        self.throttle = throttle or AdaptiveThrottle(0)
+        self.fresh = deque(enumerate(units))
+        self.retries = []  # heap of (not_before, seq, unit, attempt)
+        self.in_flight = 0
+        # Fresh units are handed out at most this many ahead of release(), bounding the consumer's reorder buffer
+        self.ahead = threading.Semaphore(ahead) if ahead else None
+        self.cond = threading.Condition()
+        self.stats = {"attempts": 0, "retries": 0, "recovered": 0, "failed": 0, "reasons": {}}
+    
+    def next(self, stop):
+        """(seq, unit, attempt) of the next unit to fetch, None once every unit is settled"""
+        with self.cond:
+            while not stop.is_set():
+                now = time.monotonic()
+                if self.retries and self.retries[0][0] <= now:
+                    _, seq, unit, attempt = heapq.heappop(self.retries)
+                    self.in_flight += 1
+                    return seq, unit, attempt
+                if self.fresh and (self.ahead is None or self.ahead.acquire(blocking=False)):
+                    seq, unit = self.fresh.popleft()
+                    self.in_flight += 1
+                    return seq, unit, 1
+                if not (self.fresh or self.retries or self.in_flight):
+                    return None
+                wait = self.retries[0][0] - now if self.retries else 0.1
+                self.cond.wait(min(max(wait, 0.01), 0.1))
+        return None
+    
+    def release(self):
+        """The consumer is done with one unit, fetchers may run one unit further ahead"""
+        if self.ahead is not None:
+            self.ahead.release()
+        with self.cond:
+            self.cond.notify_all()
+    
+    def attempt(self, fetch, unit, attempt, stop=None):
+        """One throttled attempt at fetch(unit, fresh) within the unit's time budget, returns (result, error)"""
+        self.throttle.wait(stop)
+        started = time.monotonic()
+        _unit_deadline.at = started + self.policy.unit_timeout if self.policy.unit_timeout else None
+        try:
+            result = fetch(unit, attempt > 1)
+        except Exception as e:
+            self.throttle.failure()
+            return None, e
+        finally:
+            _unit_deadline.at = None
+        self.throttle.success(time.monotonic() - started)
+        return result, None
+    
+    def _settle(self, unit, attempt, error):
+        """Count an attempt, returns the failure message and the backoff delay when the unit gets another try"""
+        self.stats["attempts"] += 1
+        if error is None:
+            if attempt > 1:
+                self.stats["recovered"] += 1
+            return None, None
+        reason = failure_reason(error)
+        self.stats["reasons"][reason] = self.stats["reasons"].get(reason, 0) + 1
+        message = f"{reason}: {error}".strip()
+        if attempt >= self.policy.attempts:
+            self.stats["failed"] += 1
+            return message, None
+        self.stats["retries"] += 1
+        term, college_code, _, subject_code, _ = unit
+        delay = self.policy.delay(attempt)
+        print(f"    🔁 {term} {college_code} {subject_code} failed ({message}), "
+              f"attempt {attempt + 1}/{self.policy.attempts} in {delay:.1f}s")
+        return message, delay
+    
+    def run(self, fetch, job, stop):
+        """Fetch a unit from next(), returns (result, error message) or None when it was requeued"""
+        seq, unit, attempt = job
+        result, error = self.attempt(fetch, unit, attempt, stop)
+        with self.cond:
+            self.in_flight -= 1
+            message, delay = self._settle(unit, attempt, error)
+            if delay is not None and not stop.is_set():
+                heapq.heappush(self.retries, (time.monotonic() + delay, seq, unit, attempt + 1))
+                self.cond.notify_all()
+                return None
+            self.cond.notify_all()
+        return result, message
+    
+    def run_inline(self, fetch, unit):
+        """Fetch one unit with all its retries in the calling thread, returns (result, error message)"""
+        for attempt in range(1, self.policy.attempts + 1):
+            result, error = self.attempt(fetch, unit, attempt)
+            with self.cond:
+                message, delay = self._settle(unit, attempt, error)
+            if delay is None:
+                return result, message
+            time.sleep(delay)
+    
+    def drain(self):
+        """Return and clear the counters, for shipping them out of a worker process"""
+        with self.cond:
+            drained = self.stats
+            self.stats = {"attempts": 0, "retries": 0, "recovered": 0, "failed": 0, "reasons": {}}
+        return drained
+    
+    def merge(self, drained):
+        """Add counters drained from another process"""
+        with self.cond:
+            for name, value in drained.items():
+                if name == "reasons":
+                    for reason, count in value.items():
+                        self.stats["reasons"][reason] = self.stats["reasons"].get(reason, 0) + count
+                else:
+                    self.stats[name] += value
+    
+    def summary(self):
+        with self.cond:
+            summary = dict(self.stats, reasons=dict(self.stats["reasons"]))
+        summary["throttle"] = {"delay": round(self.throttle.delay, 3), "peak_delay": round(self.throttle.peak_delay, 3),
+                               "waited": round(self.throttle.waited, 3)}
+        return summary
+    
+    def report(self):
+        """Print retry counters, failure reasons and what the throttle did"""
+        summary = self.summary()
+        reasons = ", ".join(f"{reason}={count}" for reason, count in sorted(summary["reasons"].items()))
+        print(f"🔁 Unit attempts: {summary['attempts']}, retried {summary['retries']}, "
+              f"recovered {summary['recovered']}, gave up {summary['failed']}" + (f" ({reasons})" if reasons else ""))
+        throttle = summary["throttle"]
+        if throttle["peak_delay"]:
+            print(f"🚦 Throttle: peak gap {throttle['peak_delay']:.2f}s between fetches, "
+                  f"{throttle['waited']:.1f}s spent waiting")
+
+class StageQueue(queue.Queue):
+    """Bounded queue between two pipeline stages, tracks its depth and how long each side was blocked"""
+    
+    def __init__(self, name, maxsize):
+        super().__init__(maxsize)
+        self.name = name
+        self.items = 0
+        self.samples = 0
+        self.depth_sum = 0
+        self.max_depth = 0
+        self.put_wait = 0.0
+        self.get_wait = 0.0
+    
+    def _sample(self):
+        # Called by Queue with its mutex held
+        depth = len(self.queue)
+        self.samples += 1
+        self.depth_sum += depth
+        self.max_depth = max(self.max_depth, depth)
+    
+    def _put(self, item):
+        super()._put(item)
+        self.items += 1
+        self._sample()
+    
+    def _get(self):
+        item = super()._get()
+        self._sample()
+        return item
+    
+    def send(self, item, stop):
+        """Put, blocking while the queue is full (backpressure), False once the pipeline stopped"""
+        started = time.perf_counter()
+        try:
+            while not stop.is_set():
+                try:
+                    self.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            with self.mutex:
+                self.put_wait += time.perf_counter() - started
+    
+    def receive(self, stop):
+        """Get, blocking while the queue is empty, PIPELINE_DONE once the pipeline stopped"""
+        started = time.perf_counter()
+        try:
+            while not stop.is_set():
+                try:
+                    return self.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return PIPELINE_DONE
+        finally:
+            with self.mutex:
+                self.get_wait += time.perf_counter() - started
+    
+    def stats(self):
+        with self.mutex:
+            return {
+                "capacity": self.maxsize,
+                "items": self.items,
+                "max_depth": self.max_depth,
+                "mean_depth": round(self.depth_sum / self.samples, 2) if self.samples else 0.0,
+                "put_wait": round(self.put_wait, 3),
+                "get_wait": round(self.get_wait, 3),
+            }
+
+PIPELINE_DONE = object()
+
+class CrawlPipeline:
+    """Fetch -> extract -> normalize -> sink stages on their own threads, joined by bounded queues
+    
+    The page of unit N is parsed and written out while unit N+1 is being fetched.
+    A full queue blocks the stage feeding it, so a slow sink throttles the fetchers
+    instead of piling pages up in memory. results() runs the sink side in the calling
+    thread (the SQLite connection stays where it was opened) and yields
+    (unit, courses, error, page_hash) in crawl order. fetch(unit, fresh) runs under
+    a UnitScheduler, fresh is True on retries.
+    """
+    
+    def __init__(self, fetch, units, fetchers=1, archive=None, depth=8, policy=None, throttle=None):
+        self.fetch = fetch
+        self.fetchers = max(1, fetchers)
+        self.archive = archive
+        # Fetchers may run at most this many units ahead of the sink, which bounds the reorder buffer
+        self.scheduler = UnitScheduler(units, policy, throttle, ahead=self.fetchers + 3 * depth)
+        self.pages = StageQueue("pages", depth)
+        self.rows = StageQueue("rows", depth)
+        self.courses = StageQueue("courses", depth)
+        self.stop = threading.Event()
+        self.threads = []
+    
+    def _fetch_stage(self):
+        try:
+            while True:
+                job = self.scheduler.next(self.stop)
+                if job is None:
+                    break
+                outcome = self.scheduler.run(self.fetch, job, self.stop)
+                if outcome is None:
+                    # Requeued, some fetcher tries it again after the backoff
+                    continue
+                seq, unit, _ = job
+                html, error = outcome
+                if not self.pages.send((seq, unit, html, error), self.stop):
+                    break
+        finally:
+            self.pages.send(PIPELINE_DONE, self.stop)
+    
+    def _extract_stage(self):
+        running = self.fetchers
+        while running:
+            item = self.pages.receive(self.stop)
+            if item is PIPELINE_DONE:
+                if self.stop.is_set():
+                    return
+                running -= 1
+                continue
+            seq, unit, html, error = item
+            fields, page_hash = [], None
+            if error is None:
+                try:
+                    with spans.span("extract", unit[1], unit[3]) as span:
+                        page_hash = self.archive.put(html) if self.archive else None
+                        fields = extract_rows_from_html(html)
+                        span["rows"] = len(fields)
+                except Exception as e:
+                    error = str(e)
+            # Drop the page before blocking on the next queue
+            del html
+            if not self.rows.send((seq, unit, fields, page_hash, error), self.stop):
+                return
+        self.rows.send(PIPELINE_DONE, self.stop)
+    
+    def _normalize_stage(self):
+        while True:
+            item = self.rows.receive(self.stop)
+            if item is PIPELINE_DONE:
+                break
+            seq, unit, fields, page_hash, error = item
+            term, college_code, college_name, subject_code, _ = unit
+            courses = []
+            if error is None:
+                try:
+                    with spans.span("normalize", college_code, subject_code) as span:
+                        for row in fields:
+                            course = build_course(row, college_code, college_name, subject_code, term)
+                            if course:
+                                courses.append(course)
+                        span["rows"] = len(courses)
+                except Exception as e:
+                    courses, error = [], str(e)
+            if not self.courses.send((seq, (unit, courses, error, page_hash)), self.stop):
+                return
+        self.courses.send(PIPELINE_DONE, self.stop)
+    
+    def results(self):
+        """Start the stage threads and yield every unit's result in crawl order"""
+        stages = [self._fetch_stage] * self.fetchers + [self._extract_stage, self._normalize_stage]
+        self.threads = [threading.Thread(target=stage, name=f"crawl-{stage.__name__.strip('_')}", daemon=True)
+                        for stage in stages]
+        for thread in self.threads:
+            thread.start()
+        
+        pending = {}
+        next_seq = 0
+        try:
+            while True:
+                item = self.courses.receive(self.stop)
+                if item is PIPELINE_DONE:
+                    break
+                seq, result = item
+                pending[seq] = result
+                while next_seq in pending:
+                    yield pending.pop(next_seq)
+                    next_seq += 1
+                    self.scheduler.release()
+        finally:
+            self.close()
+    
+    def close(self):
+        """Stop the stage threads and record the queue statistics"""
+        self.stop.set()
+        for thread in self.threads:
+            thread.join()
+        for stage_queue in (self.pages, self.rows, self.courses):
+            spans.record_queue(stage_queue.name, stage_queue.stats())
+
+def scrape_colleges_parallel(units, workers, headless, collector, base_url=GLOBAL_SEARCH_URL,
+                             recycle_after=200, max_rss_mb=None, policy=None, max_delay=10.0):
+    """Scrape all (term, college, subject) units on a pool of worker processes, one browser each"""
+    units = pending_units(units, collector)
+    
+    print(f"🧵 Dispatching {len(units)} subjects to {workers} workers")
+    
+    # Workers retry and throttle on their own, this one only adds up their counters
+    scheduler = UnitScheduler(policy=policy)
+    archive_root = collector.archive.root if collector.archive else None
+    initargs = (headless, base_url, waits.timeout, archive_root, recycle_after, max_rss_mb, scheduler.policy, max_delay)
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+        # imap yields results in submission order, so the output order is deterministic
+        # Only as many workers as there are units ever get one
+        results = _merge_worker_telemetry(pool.imap(_scrape_unit, units), scheduler, min(workers, len(units)))
+        collect_unit_results(results, len(units), collector)
+        pool.close()
+        pool.join()
+    return scheduler
+
+def create_http_session(pool_size=2):
+    """Keep-alive requests.Session with retries on transient server errors"""
+    session = requests.Session()
+    # A read timeout means the unit's time budget is gone, the UnitScheduler decides about retrying it
+    retries = Retry(total=3, read=False, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=None)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HTTP_HEADERS)
+    return session
+
+def _form_fields(form):
+    """Successful controls of a form as (name, value) pairs, submit buttons excluded"""
+    fields = []
+    for control in form.find_all(["input", "select", "textarea"]):
+        name = control.get("name")
+        if not name or control.has_attr("disabled"):
+            continue
+        if control.name == "select":
+            options = control.find_all("option")
+            selected = [o for o in options if o.has_attr("selected")] or options[:1]
+            fields.extend((name, o.get("value", o.get_text(strip=True))) for o in selected)
+        elif control.name == "textarea":
+            fields.append((name, control.get_text()))
+        else:
+            kind = control.get("type", "text").lower()
+            if kind in ("submit", "button", "image", "reset", "file"):
+                continue
+            if kind in ("checkbox", "radio") and not control.has_attr("checked"):
+                continue
+            fields.append((name, control.get("value", "on")))
+    return fields
+
+class GlobalSearchHttpClient:
+    """Drives the Global Search forms by replaying their posts over one requests.Session"""
+    
+    def __init__(self, session, base_url=GLOBAL_SEARCH_URL, timeout=30):
+        self.session = session
+        self.base_url = base_url
+        self.timeout = timeout
+        self.term = None
+        self.college_code = None
+        self.subject_page = None
+    
+    def _get(self):
+        response = self.session.get(self.base_url, timeout=unit_time_left(self.timeout))
+        response.raise_for_status()
+        return response.text
+    
+    def _submit(self, soup, button, values, drop=()):
+        """Post the page's form with some fields replaced, as if `button` was clicked"""
+        form = soup.find("form")
+        if form is None:
+            raise NavigationError("page has no form to submit")
+        fields = [(n, v) for n, v in _form_fields(form) if n not in values and n not in drop]
+        for name, value in values.items():
+            fields.append((name, value))
+        submit = form.find("input", attrs={"name": button})
+        fields.append((button, submit.get("value", "") if submit else ""))
+        
+        action = urljoin(self.base_url, form.get("action") or self.base_url)
+        timeout = unit_time_left(self.timeout)
+        if form.get("method", "get").lower() == "post":
+            response = self.session.post(action, data=fields, timeout=timeout)
+        else:
+            response = self.session.get(action, params=fields, timeout=timeout)
+        response.raise_for_status()
+        return response.text
+    
+    def discover_colleges(self):
+        """Return (college_code, college_name) for every college checkbox on the start page"""
+        return parse_colleges(self._get())
+    
+    def open_college(self, college_code, college_name, term=TERM_CODE):
+        """Start a fresh search and move to the subject selection page of one college in one term"""
+        self.college_code = None
+        with spans.span("page_load", college_code):
+            soup = BeautifulSoup(self._get(), HTML_PARSER)
+        with spans.span("college_select", college_code):
+            self._select_college(soup, college_code, college_name, term)
+    
+    def _select_college(self, soup, college_code, college_name, term):
+        checkbox = soup.find("input", attrs={"type": "checkbox", "value": college_code})
+        if checkbox is None:
+            raise NavigationError(f"college {college_code} not offered on start page")
+        
+        # Uncheck every college, then check only this one
+        college_fields = {cb.get("name") for cb in soup.find_all("input", attrs={"type": "checkbox"})
+                          if is_college_code(cb.get("value"))}
+        values = {"term_value": term, checkbox.get("name"): college_code}
+        if soup.find("input", attrs={"name": "selectedInstName"}):
+            values["selectedInstName"] = college_name
+        page = self._submit(soup, "next_btn", values, drop=college_fields)
+        
+        self.subject_page = BeautifulSoup(page, HTML_PARSER)
+        if self.subject_page.find("select", attrs={"name": "subject_name"}) is None:
+            raise NavigationError(f"no subject dropdown after selecting {college_code}")
+        self.term = term
+        self.college_code = college_code
+    
+    def get_subjects(self):
+        """Return (subject_code, subject_name) for every option in the subject dropdown"""
+        return parse_subjects(self.subject_page)
+    
+    def search_subject(self, subject_code, subject_name):
+        """Submit the subject search of the open college and return the results page"""
+        values = {"subject_name": subject_code, "courseCareer": "UGRD"}
+        if self.subject_page.find("input", attrs={"name": "selectedSubjectName"}):
+            values["selectedSubjectName"] = subject_name
+        return self._submit(self.subject_page, "search_btn_search", values)
+
+def plan_http_work_units(client, colleges, term=TERM_CODE, discovery=None):
+    """Open every college the discovery cache lacks over HTTP and return the term's (term, college, subject) work units"""
+    def list_subjects(college_code, college_name):
+        client.open_college(college_code, college_name, term)
+        return client.get_subjects()
+    return plan_units(colleges, list_subjects, term, discovery)
+
+def scrape_colleges_http(client, units, sessions, collector, base_url=GLOBAL_SEARCH_URL, queue_depth=8,
+                         policy=None, throttle=None, discovery=None):
+    """Scrape all (term, college, subject) units over a pool of keep-alive HTTP sessions"""
+    units = pending_units(units, collector)
+    
+    # Each client keeps its own server-side search state, so a unit borrows one exclusively
+    clients = queue.Queue()
+    clients.put(client)
+    for _ in range(sessions - 1):
+        clients.put(GlobalSearchHttpClient(create_http_session(), base_url))
+    
+    def fetch_page(unit, fresh):
+        term, college_code, college_name, subject_code, subject_name = unit
+        http_client = clients.get()
+        try:
+            # Retries open the college again, the client may hold a broken search state
+            if fresh or (http_client.term, http_client.college_code) != (term, college_code):
+                http_client.open_college(college_code, college_name, term)
+                if discovery is not None and discovery.needs_check(term, college_code):
+                    discovery.check(term, college_code, http_client.get_subjects())
+            with spans.span("subject_search", college_code, subject_code):
+                page = http_client.search_subject(subject_code, subject_name)
+            return check_results_page(page, college_code, subject_code)
+        except Exception:
+            http_client.college_code = None
+            raise
+        finally:
+            clients.put(http_client)
+    
+    print(f"🌐 Fetching {len(units)} subjects over {sessions} HTTP sessions")
+    # One fetcher thread per session, extraction and the sinks overlap with the fetches
+    pipeline = CrawlPipeline(fetch_page, units, sessions, collector.archive, queue_depth, policy, throttle)
+    collect_unit_results(pipeline.results(), len(units), collector)
+    
+    while not clients.empty():
+        clients.get().session.close()
+    return pipeline.scheduler
+
+def scrape_colleges_sequential(session, units, collector, queue_depth=8, policy=None, throttle=None):
+    """Scrape every (term, college, subject) unit one after another in a single browser session"""
+    units = pending_units(units, collector)
+    total_units = len(units)
+    current = None
+    
+    # The session opens the college when needed and restarts the browser when it is due,
+    # pages are parsed and saved while the browser already loads the next subject
+    def fetch_page(unit, fresh):
+        term, college_code, college_name, subject_code, subject_name = unit
+        return session.fetch_page(college_code, college_name, subject_code, term, fresh)
+    
+    pipeline = CrawlPipeline(fetch_page, units, 1, collector.archive, queue_depth, policy, throttle)
+    for unit_index, (unit, courses, error, page_hash) in enumerate(pipeline.results()):
+        term, college_code, college_name, subject_code, subject_name = unit
+        
+        if current != (term, college_code):
+            if current is not None:
+                print(f"  💾 Progress saved: {collector.count} total courses so far")
+            print(f"\n{'='*60}")
+            print(f"Scraping college: {college_name} ({college_code}) - term {term}")
+            print(f"{'='*60}")
+            current = (term, college_code)
+        
+        print(f"\n  Scraped subject {subject_code} ({subject_name}) - {unit_index+1}/{total_units}")
+        if error:
+            print(f"    ❌ Error scraping {subject_name}: {error}")
+            collector.fail_unit(unit, error)
+            continue
+        collector.add_unit(unit, courses, page_hash)
+        print(f"    ✅ Found {len(courses)} courses for {subject_name}")
+    
+    print(f"  💾 Progress saved: {collector.count} total courses so far")
+    return pipeline.scheduler
+
+def get_data_dir():
+    """data/ folder at the project root, created if it doesn't exist"""
     # Get the project root directory (parent of scripts folder)
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(script_dir)
@@ -217,316 +2743,109 @@ def scrape_all_cuny_colleges():
     
     # Create data directory if it doesn't exist
     os.makedirs(data_dir, exist_ok=True)
-    
-    # Output file path
+    return data_dir
+
+def output_paths(data_dir, compress=False):
+    """Legacy JSON array file and the JSONL file courses stream into"""
     output_file = os.path.join(data_dir, "cuny_all_courses_raw.json")
+    stream_file = os.path.join(data_dir, "cuny_all_courses_raw.jsonl" + (".gz" if compress else ""))
+    return output_file, stream_file
+
+def scrape_all_cuny_colleges(workers=1, headless=False, backend="selenium", sessions=4,
+                             base_url=GLOBAL_SEARCH_URL, wait_timeout=20, resume=False, compress=False,
+                             batch_size=5000, archive_pages=True, metrics_dir=None, terms=(TERM_CODE,),
+                             recycle_after=200, max_browser_mb=None, queue_depth=8, retries=2, backoff=2.0,
+                             unit_timeout=180.0, max_delay=10.0, discovery_ttl=DISCOVERY_TTL_HOURS):
+    """Extract courses for all CUNY colleges, subjects and terms, save to single JSON file, False if the run failed"""
+    terms = list(dict.fromkeys(terms))
+    data_dir = get_data_dir()
+    
+    # Output file paths, courses stream into the JSONL file and the JSON array is built at the end
+    output_file, stream_file = output_paths(data_dir, compress)
+    sink = JsonlSink(stream_file)
     
-    # Initialize empty JSON file at start
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump([], f)
-    print(f"📝 Initialized JSON file: {output_file}")
+    db_path = os.path.join(data_dir, "classconnect.db")
+    initialize_database(db_path)
+    frontier = CrawlFrontier(db_path, terms)
+    discovery = DiscoveryCache(db_path, discovery_ttl)
     
-    # List to store all courses from all colleges and subjects
-    all_courses = []
+    db_writer = CourseDbWriter(db_path, batch_size, terms)
+    archive = PageArchive(os.path.join(data_dir, "page_archive"), db_path) if archive_pages else None
+    collector = CrawlCollector(sink, frontier, db_writer, archive)
+    if resume:
+        # Keep what the interrupted run saved and skip its completed units
+        collector.resume()
+        print(f"♻️ Resuming with {collector.count} courses from {stream_file}")
+        frontier.report()
+    else:
+        # Initialize empty JSONL file at start
+        frontier.reset()
+        sink.open(truncate=True)
+        print(f"📝 Initialized JSONL file: {stream_file}")
     
-    driver = webdriver.Chrome()
+    session = None
+    ok = False
+    waits.timeout = wait_timeout
+    policy = RetryPolicy(retries + 1, backoff, unit_timeout=unit_timeout)
     
     try:
-        # Navigate to CUNY Global Search
-        driver.get("https://globalsearch.cuny.edu/CFGlobalSearchTool/CFSearchToolController")
-        time.sleep(3)  # TODO: replace with WebDriverWait
-        
-        # Get all college checkboxes - try multiple selectors
-        college_checkboxes = driver.find_elements(By.CSS_SELECTOR, "input[type='checkbox']")
-        
-        # Filter to only college checkboxes (they have values like HTR01, BKL01, etc.)
-        colleges = []
-        for checkbox in college_checkboxes:
-            college_code = checkbox.get_attribute("value")
-            # College codes are typically 5 characters (e.g., HTR01, BKL01, QNS01)
-            if college_code and len(college_code) == 5 and college_code[:3].isalpha() and college_code[3:].isdigit():
-                # Try to find the label for this checkbox
-                college_name = college_code  # Default fallback
-                try:
-                    # Method 1: Find label by for attribute
-                    label = driver.find_element(By.CSS_SELECTOR, f"label[for='{checkbox.get_attribute('id')}']")
-                    college_name = label.text.strip()
-                except:
-                    try:
-                        # Method 2: Find following sibling label
-                        college_name = checkbox.find_element(By.XPATH, "./following-sibling::label[1]").text.strip()
-                    except:
-                        try:
-                            # Method 3: Find parent and then label
-                            parent = checkbox.find_element(By.XPATH, "./..")
-                            label = parent.find_element(By.TAG_NAME, "label")
-                            college_name = label.text.strip()
-                        except:
-                            # Keep default
-                            pass
-                
-                colleges.append((college_code, college_name))
-        
+        # Navigate to CUNY Global Search and list the colleges
+        if backend == "http":
+            client = GlobalSearchHttpClient(create_http_session(), base_url)
+            with spans.span("page_load"):
+                colleges = client.discover_colleges()
+        else:
+            session = BrowserSession(headless, base_url, recycle_after, max_browser_mb, discovery=discovery)
+            colleges = discover_colleges(session.driver, base_url)
         total_colleges = len(colleges)
         print(f"🏫 Found {total_colleges} CUNY colleges to scrape")
         
-        # Select term (2025 Fall) - this applies to all colleges
-        term_select = Select(driver.find_element(By.NAME, "term_value"))
-        term_select.select_by_value("1259")  # 2025 Fall Term
-        print("✅ Selected 2025 Fall Term")
+        # Subjects are listed per term, a college's dropdown can change between terms.
+        # Units stay grouped by term so sessions stay on one term
+        units = []
+        for term in terms:
+            pending = [c for c in colleges if not frontier.college_done(term, c[0])]
+            if backend == "http":
+                units += plan_http_work_units(client, pending, term, discovery)
+            else:
+                units += plan_work_units(session.driver, pending, base_url, term, discovery)
+        print(f"🗓️ {len(units)} work units in {len(terms)} terms")
         
-        # Loop through each college
-        for college_index, (college_code, college_name) in enumerate(colleges):
-            print(f"\n{'='*60}")
-            print(f"Scraping college: {college_name} ({college_code}) - {college_index+1}/{total_colleges}")
-            print(f"{'='*60}")
-            
-            try:
-                # Navigate back to the initial page if not already there
-                if college_index > 0:
-                    driver.get("https://globalsearch.cuny.edu/CFGlobalSearchTool/CFSearchToolController")
-                    time.sleep(3)
-                    term_select = Select(driver.find_element(By.NAME, "term_value"))
-                    term_select.select_by_value("1259")
-                
-                # Select this college (uncheck all first, then check this one)
-                # Uncheck all college checkboxes
-                all_checkboxes = driver.find_elements(By.CSS_SELECTOR, "input[type='checkbox']")
-                for cb in all_checkboxes:
-                    cb_value = cb.get_attribute("value")
-                    # Only uncheck college checkboxes (5 char codes like HTR01)
-                    if cb_value and len(cb_value) == 5 and cb_value[:3].isalpha() and cb_value[3:].isdigit():
-                        if cb.is_selected():
-                            driver.execute_script("arguments[0].click();", cb)
-                
-                # Select the current college
-                college_checkbox = driver.find_element(By.CSS_SELECTOR, f"input[value='{college_code}']")
-                if not college_checkbox.is_selected():
-                    driver.execute_script("arguments[0].click();", college_checkbox)
-                print(f"✅ Selected {college_name} ({college_code})")
-                
-                # Click Next to go to subject selection
-                next_btn = driver.find_element(By.NAME, "next_btn")
-                next_btn.click()
-                time.sleep(3)  # TODO: replace with WebDriverWait
-                
-                # Select Undergraduate
-                try:
-                    ug_select = Select(driver.find_element(By.NAME, "courseCareer"))
-                    ug_select.select_by_value("UGRD")
-                    print("✅ Selected Undergraduate")
-                except:
-                    print("⚠️ Could not select Undergraduate, continuing...")
-                
-                # Get all subject options
-                try:
-                    subject_select = Select(driver.find_element(By.NAME, "subject_name"))
-                    subject_options = subject_select.options
-                except Exception as e:
-                    print(f"❌ Could not find subject dropdown for {college_name}: {e}")
-                    continue
-                
-                # Skip placeholder options (first one is usually empty/placeholder)
-                subjects = []
-                for option in subject_options[1:]:  # Skip first empty option
-                    subject_code = option.get_attribute("value")
-                    subject_name = option.text.strip()
-                    # Skip if it's a placeholder
-                    if subject_code and subject_name and subject_name.lower() not in ["none", "select subject", ""]:
-                        subjects.append((subject_code, subject_name))
-                
-                total_subjects = len(subjects)
-                print(f"📚 Found {total_subjects} subjects for {college_name}")
-                
-                if total_subjects == 0:
-                    print(f"⚠️ No subjects found for {college_name}, skipping...")
-                    continue
-                
-                # Scrape each subject
-                for subject_index, (subject_code, subject_name) in enumerate(subjects):
-                    print(f"\n  Scraping subject {subject_code} ({subject_name}) - {subject_index+1}/{total_subjects}")
-                    
-                    try:
-                        # Select the subject
-                        subject_select = Select(driver.find_element(By.NAME, "subject_name"))
-                        subject_select.select_by_value(subject_code)
-                        
-                        # Click Search button
-                        search_btn = driver.find_element(By.NAME, "search_btn_search")
-                        search_btn.click()
-                        time.sleep(4)  # TODO: replace with WebDriverWait - wait for results to load
-                        
-                        # Click ALL expand buttons to show all sections
-                        print("    Expanding all course sections...")
-                        expand_buttons = driver.find_elements(By.CSS_SELECTOR, "a[id^='imageDivLink']")
-                        
-                        for i, btn in enumerate(expand_buttons):
-                            try:
-                                driver.execute_script("arguments[0].click();", btn)
-                                if (i + 1) % 20 == 0 and len(expand_buttons) > 20:
-                                    print(f"    Clicked {i + 1}/{len(expand_buttons)} expand buttons...")
-                            except:
-                                continue
-                        time.sleep(2)  # Wait for all sections to expand
-                        
-                        # Extract data from all visible course tables
-                        course_tables = driver.find_elements(By.CSS_SELECTOR, "table.classinfo")
-                        print(f"    Found {len(course_tables)} course tables")
-                        
-                        # Track courses found for this subject
-                        courses_for_subject = 0
-                        
-                        for table in course_tables:
-                            try:
-                                rows = table.find_elements(By.CSS_SELECTOR, "tbody tr")
-                                
-                                for row in rows:
-                                    try:
-                                        cells = row.find_elements(By.TAG_NAME, "td")
-                                        
-                                        # Initialize course dict with all fields
-                                        course_code = ""
-                                        course_name = ""
-                                        section = ""
-                                        days_times = ""
-                                        room = ""
-                                        instructor = ""
-                                        instruction_mode = ""
-                                        status = ""
-                                        
-                                        # Extract data from each cell based on data-label
-                                        for cell in cells:
-                                            data_label = cell.get_attribute("data-label")
-                                            cell_text = cell.text.strip()
-                                            
-                                            if data_label == "Class" and cell_text:
-                                                course_code = cell_text
-                                            elif data_label == "Course Topic" and cell_text:
-                                                course_name = cell_text
-                                            elif data_label == "Section" and cell_text:
-                                                section = cell_text
-                                            elif data_label == "DaysAndTimes" and cell_text:
-                                                days_times = cell_text
-                                            elif data_label == "Room" and cell_text:
-                                                room = cell_text
-                                            elif data_label == "Instructor" and cell_text:
-                                                instructor = cell_text
-                                            elif data_label == "Instruction Mode" and cell_text:
-                                                instruction_mode = cell_text
-                                            elif data_label == "Status" and cell_text:
-                                                status = cell_text
-                                        
-                                        # Only process if we have course code and name
-                                        if course_code and course_name:
-                                            # Parse days and times
-                                            days, start_time, end_time = parse_days_times(days_times)
-                                            
-                                            # Parse catalog number from course code
-                                            catalog_number, class_number = parse_course_code(course_code)
-                                            
-                                            # Create course dict with desired structure
-                                            course = {
-                                                "collegeCode": college_code,
-                                                "collegeName": college_name,
-                                                "subject": subject_code,
-                                                "catalogNumber": catalog_number,
-                                                "classNumber": class_number,  # May be None if not available
-                                                "section": section if section else None,
-                                                "title": course_name,
-                                                "days": days,
-                                                "startTime": start_time,
-                                                "endTime": end_time,
-                                                "instructor": instructor if instructor else "TBA",
-                                                "location": room if room else None,
-                                                "status": status if status else None,
-                                                "instructionMode": instruction_mode if instruction_mode else None
-                                            }
-                                            
-                                            # Add to all_courses list
-                                            all_courses.append(course)
-                                            courses_for_subject += 1
-                                            
-                                    except Exception as e:
-                                        # Skip bad rows, continue with next row
-                                        continue
-                                        
-                            except Exception as e:
-                                print(f"    Error parsing table: {e}")
-                                continue
-                        
-                        print(f"    ✅ Found {courses_for_subject} courses for {subject_name}")
-                        
-                        # Go back to search page for next subject
-                        # Try multiple methods to go back
-                        try:
-                            # Method 1: Look for "New Search" button
-                            new_search_btn = driver.find_elements(By.NAME, "new_search_btn")
-                            if new_search_btn and new_search_btn[0].is_displayed():
-                                new_search_btn[0].click()
-                                time.sleep(2)
-                            else:
-                                # Method 2: Look for "Change Search" or similar
-                                change_search = driver.find_elements(By.PARTIAL_LINK_TEXT, "Change Search")
-                                if change_search:
-                                    change_search[0].click()
-                                    time.sleep(2)
-                                else:
-                                    # Method 3: Use browser back
-                                    driver.back()
-                                    time.sleep(2)
-                        except:
-                            # Fallback: use browser back
-                            try:
-                                driver.back()
-                                time.sleep(2)
-                            except:
-                                pass
-                        
-                        # Refresh the subject select element after going back
-                        try:
-                            subject_select = Select(driver.find_element(By.NAME, "subject_name"))
-                        except:
-                            # If we can't find it, we might need to navigate back to college selection
-                            print(f"    ⚠️ Could not find subject dropdown, may need to restart for next subject")
-                            break
-                        
-                    except Exception as e:
-                        print(f"    ❌ Error scraping {subject_name}: {e}")
-                        # Try to go back and continue with next subject
-                        try:
-                            driver.back()
-                            time.sleep(2)
-                            subject_select = Select(driver.find_element(By.NAME, "subject_name"))
-                        except:
-                            # If navigation fails, break out of subject loop and move to next college
-                            print(f"    ⚠️ Navigation failed, moving to next college")
-                            break
-                        continue
-                
-            except Exception as e:
-                print(f"❌ Error processing college {college_name}: {e}")
-                import traceback
-                traceback.print_exc()
-                continue
-            
-            # Save incrementally after each college (so you can see progress)
-            if all_courses:
-                save_courses_to_json(output_file, all_courses)
-                print(f"  💾 Progress saved: {len(all_courses)} total courses so far")
+        if backend == "http":
+            scheduler = scrape_colleges_http(client, units, max(1, sessions), collector, base_url, queue_depth,
+                                             policy, AdaptiveThrottle(max_delay), discovery)
+        elif workers > 1:
+            # Workers start their own browsers, so release this one first
+            session.quit()
+            session = None
+            scheduler = scrape_colleges_parallel(units, workers, headless, collector, base_url, recycle_after,
+                                                 max_browser_mb, policy, max_delay)
+        else:
+            scheduler = scrape_colleges_sequential(session, units, collector, queue_depth,
+                                                   policy, AdaptiveThrottle(max_delay))
+        sink.close()
+        coverage = frontier.coverage()
+        unfinished = sum(counts["failed"] + counts["pending"] for counts in coverage.values())
         
         # Final save to JSON file and database
         print(f"\n{'='*60}")
-        print("🎊 ALL COLLEGES AND SUBJECTS COMPLETED!")
+        print("🎊 ALL COLLEGES AND SUBJECTS COMPLETED!" if not unfinished else f"⚠️ {unfinished} SUBJECTS NOT DONE")
         print(f"{'='*60}")
         
-        # Final save to JSON file (in case of any updates)
-        save_courses_to_json(output_file, all_courses)
-        print(f"✅ Saved {len(all_courses)} classes to JSON: {output_file}")
+        if unfinished:
+            # The importer reads the JSON array as the whole catalog, a partial one would drop those subjects
+            total_saved = collector.count
+            print(f"⚠️ Kept the previous {output_file}, {total_saved} classes are in {stream_file}; "
+                  f"--resume retries the subjects that are not done")
+        else:
+            # Build the JSON array file the Firestore importer reads
+            with spans.span("json_finalize") as span:
+                total_saved = span["rows"] = finalize_json_array(stream_file, output_file)
+            print(f"✅ Saved {total_saved} classes to JSON: {output_file}")
         
-        # Save to database
-        db_path = os.path.join(data_dir, "classconnect.db")
-        initialize_database(db_path)
-        save_courses_to_database(db_path, all_courses)
+        # Rows went into the database while crawling, unit by unit
+        with spans.span("db_finalize"):
+            db_writer.close()
         
         # Get total count from database
         conn = sqlite3.connect(db_path)
@@ -535,7 +2854,27 @@ def scrape_all_cuny_colleges():
         conn.close()
         
         print(f"\n📊 Total courses in database: {total_count}")
-        print(f"✅ Scraping complete. Saved {len(all_courses)} classes from {total_colleges} colleges")
+        print(f"{'⚠️ Scraping incomplete' if unfinished else '✅ Scraping complete'}. "
+              f"Saved {total_saved} classes from {total_colleges} colleges")
+        # Colleges whose dropdown changed or whose searches failed to navigate are listed again next run
+        stale = discovery.stale | {(term, unit["college"]) for term, counts in coverage.items()
+                                   for unit in counts["failed_units"] if (unit["error"] or "").startswith("navigation")}
+        if stale:
+            discovery.forget(stale)
+            print(f"🗂️ Dropped the cached subject lists of {', '.join(f'{t} {c}' for t, c in sorted(stale))}")
+        frontier.report()
+        collector.sections.report()
+        scheduler.report()
+        waits.report()
+        spans.report()
+        run_info = {"run_id": db_writer.run_id, "terms": terms, "backend": backend,
+                    "courses": total_saved, "failed_subjects": collector.failed,
+                    "retries": scheduler.summary(), "coverage": coverage,
+                    "sections": collector.sections.summary(),
+                    "discovery": {"cached": discovery.cached, "listed": discovery.listed}}
+        json_path, prom_path = spans.write_metrics(metrics_dir or data_dir, run_info)
+        print(f"📈 Stage metrics written to {json_path} and {prom_path}")
+        ok = not unfinished
                 
     except Exception as e:
         print(f"❌ Main Error: {e}")
@@ -543,7 +2882,95 @@ def scrape_all_cuny_colleges():
         traceback.print_exc()
         
     finally:
-        driver.quit()
+        if session is not None:
+            session.quit()
+        sink.close()
+        db_writer.close()
+        frontier.close()
+        discovery.close()
+        if archive is not None:
+            archive.close()
+    return ok
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Scrape CUNY Global Search into data/")
+    parser.add_argument("--terms", nargs="+", default=[TERM_CODE],
+                        help="term codes to crawl, e.g. --terms 1259 1262 (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of browser worker processes (1 = sequential crawl)")
+    parser.add_argument("--headless", action="store_true",
+                        help="run Chrome without a window (parallel workers are always headless)")
+    parser.add_argument("--backend", choices=["selenium", "http"], default="selenium",
+                        help="drive Chrome, or replay the search forms directly over HTTP")
+    parser.add_argument("--sessions", type=int, default=4,
+                        help="concurrent HTTP sessions for the http backend")
+    parser.add_argument("--base-url", default=GLOBAL_SEARCH_URL,
+                        help="Global Search controller URL (e.g. a local fake_global_search.py)")
+    parser.add_argument("--recycle-after", type=int, default=200,
+                        help="restart each browser after this many subjects (0 = never)")
+    parser.add_argument("--max-browser-mb", type=float, default=1500,
+                        help="restart a browser whose processes use more memory than this (needs psutil)")
+    parser.add_argument("--wait-timeout", type=float, default=20,
+                        help="seconds to wait for a page element before giving up")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="extra attempts for a failed subject, each after a fresh navigation")
+    parser.add_argument("--retry-backoff", type=float, default=2.0,
+                        help="seconds before the first retry, doubling with every further attempt")
+    parser.add_argument("--unit-timeout", type=float, default=180,
+                        help="seconds one subject may take, page loads and waits included (0 = no limit)")
+    parser.add_argument("--max-delay", type=float, default=10,
+                        help="upper bound of the adaptive gap between fetches when the site slows down (0 = off)")
+    parser.add_argument("--discovery-ttl", type=float, default=DISCOVERY_TTL_HOURS,
+                        help="hours to reuse the cached subject lists of colleges (0 = list every college again)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted crawl, skipping subjects it already completed")
+    parser.add_argument("--gzip", action="store_true",
+                        help="stream courses to cuny_all_courses_raw.jsonl.gz instead of plain .jsonl")
+    parser.add_argument("--no-archive", action="store_true",
+                        help="don't keep the raw results pages in data/page_archive")
+    parser.add_argument("--batch-size", type=int, default=5000,
+                        help="rows per SQLite transaction while streaming courses into the database")
+    parser.add_argument("--queue-depth", type=int, default=8,
+                        help="pages, parsed rows and courses buffered between crawl pipeline stages")
+    parser.add_argument("--metrics-dir", default=None,
+                        help="where to write scrape_metrics.json/.prom (default: data/, e.g. a node_exporter textfile dir)")
+    parser.add_argument("--rebuild-indexes", action="store_true",
+                        help="repopulate the search and meeting indexes of data/classconnect.db from courses and exit")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    scrape_all_cuny_colleges()
\ No newline at end of file
+    args = parse_args()
+    if args.rebuild_indexes:
+        db_path = os.path.join(get_data_dir(), "classconnect.db")
+        initialize_database(db_path)
+        conn = sqlite3.connect(db_path)
+        started = time.perf_counter()
+        meetings = rebuild_indexes(conn)
+        conn.close()
+        print(f"✅ Rebuilt the course search and meeting indexes ({meetings} meetings) "
+              f"in {time.perf_counter() - started:.1f}s")
+        sys.exit(0)
+    ok = scrape_all_cuny_colleges(
+        workers=max(1, args.workers),
+        headless=args.headless or args.workers > 1,
+        backend=args.backend,
+        sessions=args.sessions,
+        base_url=args.base_url,
+        wait_timeout=args.wait_timeout,
+        resume=args.resume,
+        compress=args.gzip,
+        batch_size=max(1, args.batch_size),
+        archive_pages=not args.no_archive,
+        metrics_dir=args.metrics_dir,
+        terms=args.terms,
+        recycle_after=max(0, args.recycle_after),
+        max_browser_mb=args.max_browser_mb or None,
+        queue_depth=max(1, args.queue_depth),
+        retries=max(0, args.retries),
+        backoff=max(0.0, args.retry_backoff),
+        unit_timeout=args.unit_timeout or None,
+        max_delay=max(0.0, args.max_delay),
+        discovery_ttl=max(0.0, args.discovery_ttl),
+    )
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,47 @@
+"""Smoke test every bench_scraper.py subcommand with small inputs, and the suite's baseline comparison"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+BENCH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench_scraper.py")
+
+@pytest.mark.parametrize("args", [
+    ["extract", "--courses", "10", "--sections", "2", "--repeat", "1"],
+    ["sqlite", "--rows", "200", "--batch-size", "50"],
+    ["suite", "--rounds", "1", "--baseline", "missing.json"],
+    ["memory", "--units", "2", "4", "--courses", "5", "--sections", "2", "--tolerance", "100"],
+])
+def test_subcommand_runs(args, tmp_path):
+    result = subprocess.run([sys.executable, BENCH, *args], cwd=tmp_path,
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+def test_compare_scales_the_baseline_by_calibration():
+    from bench_scraper import compare_to_baseline
+
+    baseline = {"calibration": {"rate": 2000.0}, "normalize": {"rate": 100.0}, "course_id": {"rate": 400.0}}
+    # A machine half as fast: normalize kept pace with it, course_id fell behind
+    results = {"calibration": {"rate": 1000.0}, "normalize": {"rate": 50.0}, "course_id": {"rate": 100.0}}
+    assert compare_to_baseline(results, baseline, 0.3) == ["course_id"]
+
+def test_suite_against_generated_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    run = lambda *args: subprocess.run([sys.executable, BENCH, "suite", "--rounds", "10", "--baseline", str(baseline),
+                                        *args], cwd=tmp_path, capture_output=True, text=True, timeout=300)
+    generated = run("--update-baseline")
+    assert generated.returncode == 0, generated.stdout + generated.stderr
+    # Back to back on one machine, only noise separates the runs
+    same = run("--tolerance", "0.5")
+    assert same.returncode == 0, same.stdout + same.stderr
+
+    # Ten times the generated rates on the same machine is a regression of every stage
+    stages = json.loads(baseline.read_text())
+    for name, stage in stages.items():
+        if name != "calibration":
+            stage["rate"] *= 10
+    baseline.write_text(json.dumps(stages))
+    slower = run("--tolerance", "0.5")
+    assert slower.returncode == 1, slower.stdout + slower.stderr
@@ -0,0 +1,77 @@
+"""BrowserSession replaces a browser that died mid-crawl, worker pools give up on browsers that never start"""
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+import scrape_course
+from scrape_course import (
+    BrowserSession, BrowserStartError, CourseDbWriter, CrawlCollector, CrawlFrontier, JsonlSink, RetryPolicy,
+    UnitScheduler, initialize_database, scrape_colleges_parallel,
+)
+
+class FakeDriver:
+    """Stands in for Chrome: every call fails once the browser was killed"""
+
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+
+    def get(self, url):
+        if not self.alive:
+            raise WebDriverException("chrome not reachable")
+
+    def quit(self):
+        self.quit_called = True
+
+def test_dead_browser_is_restarted(monkeypatch):
+    drivers = []
+
+    def create_driver(headless=False, lean=True):
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    def scrape_subject(driver, college_code, college_name, subject_code, subject_name, archive, term):
+        driver.get("results")
+        return [{"subject": subject_code}], None
+
+    monkeypatch.setattr(scrape_course, "create_driver", create_driver)
+    monkeypatch.setattr(scrape_course, "open_college", lambda driver, *args: driver.get("start"))
+    monkeypatch.setattr(scrape_course, "return_to_subjects", lambda driver: driver.get("back") or True)
+    monkeypatch.setattr(scrape_course, "scrape_subject", scrape_subject)
+
+    session = BrowserSession()
+    scheduler = UnitScheduler(policy=RetryPolicy(attempts=2, backoff=0))
+    results = []
+    for subject in ("ANTH", "BIOL", "CSCI", "MATH"):
+        unit = ("1259", "HTR01", "Hunter College", subject, subject)
+        if subject == "BIOL":
+            drivers[0].alive = False
+        results.append(scheduler.run_inline(
+            lambda unit, fresh: session.scrape_subject(unit[1], unit[2], unit[3], unit[4], None, unit[0], fresh),
+            unit,
+        ))
+
+    assert [error for _, error in results] == [None] * 4
+    assert [courses[0]["subject"] for (courses, _), _ in results] == ["ANTH", "BIOL", "CSCI", "MATH"]
+    assert len(drivers) == 2 and drivers[0].quit_called
+    assert session.recycles == 1
+
+def test_pool_stops_when_no_browser_starts(monkeypatch, tmp_path):
+    def create_driver(headless=False, lean=True):
+        raise WebDriverException("chrome failed to start")
+
+    # Forked workers inherit the patched module
+    monkeypatch.setattr(scrape_course, "create_driver", create_driver)
+    db_path = str(tmp_path / "classconnect.db")
+    initialize_database(db_path)
+    frontier = CrawlFrontier(db_path, ["1259"])
+    frontier.reset()
+    sink = JsonlSink(str(tmp_path / "courses.jsonl")).open(truncate=True)
+    collector = CrawlCollector(sink, frontier, CourseDbWriter(db_path))
+    units = [("1259", "HTR01", "Hunter College", subject, subject)
+             for subject in ("ANTH", "BIOL", "CSCI", "MATH", "PHYS", "STAT")]
+
+    with pytest.raises(BrowserStartError):
+        scrape_colleges_parallel(units, 2, True, collector, policy=RetryPolicy(attempts=1, backoff=0))
+    assert collector.failed >= 2
+    sink.close()
+    frontier.close()
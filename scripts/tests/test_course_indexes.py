@@ -0,0 +1,89 @@
+"""courses_fts and course_meetings stay keyed to the right courses, searches without words match nothing"""
+import sqlite3
+
+from course_search import search_courses
+from schedule_query import sections_meeting
+from scrape_course import (
+    COURSE_INSERT_SQL, COURSES_SCHEMA, CourseDbWriter, content_hash, course_to_row, initialize_database,
+    rebuild_indexes,
+)
+
+def course(subject, catalog_number, days, start, end):
+    return {
+        "termCode": "1259", "collegeCode": "HTR01", "collegeName": "Hunter College", "subject": subject,
+        "catalogNumber": catalog_number, "section": "01-LEC Regular", "title": f"{subject} {catalog_number}",
+        "days": days, "startTime": start, "endTime": end, "instructor": "Staff",
+        "location": "Room 1", "status": "Open", "instructionMode": "In Person",
+    }
+
+COURSES = [
+    course("ANTH", "101", "MoWe", "9:00AM", "10:15AM"),
+    course("BIOL", "102", "TuTh", "1:00PM", "2:15PM"),
+    course("CSCI", "127", "Fr", "1:00PM", "3:45PM"),
+]
+
+def load(db_path, courses):
+    writer = CourseDbWriter(db_path)
+    for c in courses:
+        writer.add(c)
+    writer.close()
+
+def indexed(conn):
+    """Subjects found by a search and by an afternoon time-window query"""
+    searched = sorted(c["subject"] for c in search_courses(conn, "1"))
+    afternoon = [c["subject"] for c in sections_meeting(conn, "MoTuWeThFr", 12 * 60, 17 * 60)]
+    return searched, afternoon
+
+def test_vacuum_keeps_indexes_on_their_courses(tmp_path):
+    db_path = str(tmp_path / "classconnect.db")
+    initialize_database(db_path)
+    load(db_path, COURSES)
+    conn = sqlite3.connect(db_path)
+    # VACUUM may renumber the rowids of a table that does not declare them
+    conn.execute("DELETE FROM courses WHERE subject = 'ANTH'")
+    conn.commit()
+    conn.execute("VACUUM")
+
+    assert indexed(conn) == (["BIOL", "CSCI"], ["BIOL", "CSCI"])
+    conn.close()
+
+def test_old_courses_table_gets_a_declared_rowid(tmp_path):
+    db_path = str(tmp_path / "classconnect.db")
+    conn = sqlite3.connect(db_path)
+    legacy = COURSES_SCHEMA.replace("rowid INTEGER PRIMARY KEY,", "").replace("NOT NULL UNIQUE", "PRIMARY KEY")
+    conn.execute(f"CREATE TABLE courses ({legacy})")
+    rows = [course_to_row(c) for c in COURSES]
+    conn.executemany(COURSE_INSERT_SQL, [row + (content_hash(row),) for row in rows])
+    conn.commit()
+    conn.close()
+    initialize_database(db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert "rowid" in {row[1] for row in conn.execute("PRAGMA table_info(courses)")}
+    assert indexed(conn) == (["ANTH", "BIOL", "CSCI"], ["BIOL", "CSCI"])
+    conn.close()
+
+def test_rebuild_indexes_repopulates_both_indexes(tmp_path):
+    db_path = str(tmp_path / "classconnect.db")
+    initialize_database(db_path)
+    load(db_path, COURSES)
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM course_meetings")
+    conn.execute("INSERT INTO courses_fts (courses_fts) VALUES ('delete-all')")
+    conn.commit()
+
+    assert rebuild_indexes(conn) == 5
+    assert indexed(conn) == (["ANTH", "BIOL", "CSCI"], ["BIOL", "CSCI"])
+    conn.close()
+
+def test_search_without_words_finds_nothing(tmp_path):
+    db_path = str(tmp_path / "classconnect.db")
+    initialize_database(db_path)
+    load(db_path, COURSES)
+    conn = sqlite3.connect(db_path)
+
+    assert search_courses(conn, "?!") == []
+    assert search_courses(conn, "-- ", college="HTR01") == []
+    # No text at all is a plain filter query
+    assert len(search_courses(conn, "", college="HTR01")) == 3
+    conn.close()
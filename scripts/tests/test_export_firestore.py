@@ -0,0 +1,40 @@
+"""Incremental Firestore export"""
+import json
+import os
+
+from export_firestore import export_firestore
+from scrape_course import CourseDbWriter, generate_course_id, initialize_database
+
+TERMS = ("1259", "1262")
+
+def course(term, catalog_number):
+    return {
+        "termCode": term, "collegeCode": "HTR01", "collegeName": "Hunter College", "subject": "CSCI",
+        "catalogNumber": catalog_number, "section": "01-LEC Regular", "title": f"Course {catalog_number}",
+        "days": "MoWe", "startTime": "10:00AM", "endTime": "11:15AM", "instructor": "Staff",
+        "location": "Room 1", "status": "Open", "instructionMode": "In Person",
+    }
+
+def crawl(db_path, catalog_numbers):
+    """One scrape run over CSCI at Hunter in both terms, returns its run id"""
+    writer = CourseDbWriter(db_path, terms=TERMS)
+    for term in TERMS:
+        for catalog_number in catalog_numbers:
+            writer.add(course(term, catalog_number))
+        writer.remove_missing((term, "HTR01", "CSCI"))
+    writer.close()
+    return writer.run_id
+
+def test_since_run_deletes_only_selected_terms(tmp_path):
+    db_path = str(tmp_path / "classconnect.db")
+    initialize_database(db_path)
+    first_run = crawl(db_path, ["101", "102"])
+    crawl(db_path, ["101"])
+
+    out_dir = str(tmp_path / "export")
+    manifest = export_firestore(db_path, out_dir, terms=["1259"], since_run=first_run)
+    with open(os.path.join(out_dir, manifest["shards"][0]["file"]), encoding="utf-8") as f:
+        operations = [json.loads(line) for line in f]
+
+    assert operations == [{"op": "delete", "id": generate_course_id(course("1259", "102"))}]
+    assert (manifest["sets"], manifest["deletes"]) == (0, 1)
@@ -0,0 +1,32 @@
+"""Sections listed under several subjects share one course_crosslists group"""
+import os
+import sqlite3
+
+from scrape_course import CourseDbWriter, SectionIndex, extract_courses_from_html, initialize_database
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "fixtures", "global_search", "results")
+
+def results_page(college_code, subject_code):
+    with open(os.path.join(RESULTS_DIR, f"{college_code}-{subject_code}.html"), encoding="utf-8") as f:
+        return f.read()
+
+def test_cross_listed_section_is_grouped(tmp_path):
+    db_path = str(tmp_path / "classconnect.db")
+    initialize_database(db_path)
+    writer = CourseDbWriter(db_path)
+    index = SectionIndex(writer)
+    index.begin_unit("1259", "QNS01")
+    # DANCE 150 and PSYCH 101 list one meeting under their own class numbers
+    for subject in ("CSCI", "PSYCH", "DANCE"):
+        html = results_page("QNS01", subject)
+        for course in extract_courses_from_html(html, "QNS01", "Queens College", subject, "1259"):
+            assert index.add(course)
+    writer.close()
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT groupId, subject, catalogNumber FROM course_crosslists ORDER BY subject").fetchall()
+    conn.close()
+    assert [(subject, catalog) for _, subject, catalog in rows] == [("DANCE", "61991"), ("PSYCH", "61317")]
+    assert rows[0][0] == rows[1][0]
+    assert index.summary() == {"repeats": 0, "crosslisted_sections": 1, "crosslisted_listings": 2}